@@ -0,0 +1,85 @@
+"""
+Per-request cost of authentication, measured through a FastAPI app driven as ASGI
+(routing, dependency resolution and response included): no auth, get_current_user with
+a cold and a warm verified-token cache, and the same check as a sync dependency, which
+FastAPI runs in its threadpool.
+
+Needs the usual settings in the environment or a .env file, no server or database:
+
+    python -m benchmarks.auth_overhead --requests 20000
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi import Depends, FastAPI
+
+from quizzly.auth import jwt_handler
+
+
+def sync_current_user(token: str = Depends(jwt_handler.oauth2_scheme)) -> dict:
+    return jwt_handler.verify_token(token)
+
+
+def create_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/anonymous")
+    async def anonymous():
+        return {}
+
+    @app.get("/cold")
+    async def cold(user: dict = Depends(jwt_handler.get_current_user)):
+        jwt_handler._verified_tokens.clear()
+        return {}
+
+    @app.get("/warm")
+    async def warm(user: dict = Depends(jwt_handler.get_current_user)):
+        return {}
+
+    @app.get("/threadpool")
+    async def threadpool(user: dict = Depends(sync_current_user)):
+        return {}
+
+    return app
+
+
+async def measure(app, path: str, token: str, requests: int) -> float:
+    """Seconds per request, calling the app directly with no HTTP client in between."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"authorization", f"Bearer {token}".encode())],
+        "client": ("127.0.0.1", 1), "server": ("test", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start" and message["status"] != 200:
+            raise SystemExit(f"{path} answered {message['status']}")
+
+    for _ in range(min(requests, 100)):
+        await app(dict(scope), receive, send)
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - started) / requests
+
+
+async def main(args):
+    app = create_app()
+    token = jwt_handler.create_token({"id": "bench-user", "username": "bench", "name": "Bench"})
+    results = {path: await measure(app, path, token, args.requests)
+               for path in ("/anonymous", "/cold", "/warm", "/threadpool")}
+    baseline = results["/anonymous"]
+    print(f"{'endpoint':<12} {'us/request':>10} {'auth us':>8}")
+    for path, seconds in results.items():
+        print(f"{path:<12} {seconds * 1e6:10.1f} {(seconds - baseline) * 1e6:8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,100 @@
+"""
+Cold-start budget for the API process: imports quizzly.main and calls create_app() in
+fresh interpreters under `python -X importtime`, reports the median wall time and the
+slowest imports, and exits non-zero when the budget is exceeded or a module that should
+load lazily (the content provider clients) is imported at startup.
+
+    python -m benchmarks.import_time --runs 5 --budget-ms 1500
+    python -m benchmarks.import_time --routers parent quiz --top 15
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+# Imported on first use of their route, never at startup
+LAZY_MODULES = ("googleapiclient", "duckduckgo_search", "httplib2")
+
+PLACEHOLDER_ENV = {
+    "MONGODB_URI": "mongodb://localhost:27017",
+    "SECRET_KEY": "import-time",
+    "FRONTEND_URL": "http://localhost:3000",
+    "GEMINI_API_KEY": "import-time",
+    "YOUTUBE_API_KEY": "import-time",
+    "CORS_ORIGINS": "http://localhost:3000",
+}
+
+SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+from quizzly.main import create_app
+create_app({routers!r})
+elapsed = time.perf_counter() - started
+print(json.dumps({{"ms": elapsed * 1000, "modules": sorted(sys.modules)}}))
+"""
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def run_once(routers: list) -> dict:
+    env = dict(os.environ)
+    for key, value in PLACEHOLDER_ENV.items():
+        env.setdefault(key, value)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", SCRIPT.format(routers=routers)],
+        env=env, capture_output=True, text=True, check=False,
+    )
+    if proc.returncode:
+        raise SystemExit(f"create_app() failed:\n{proc.stderr[-2000:]}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    # Cumulative time of each top-level package, and of each quizzly module
+    packages = {}
+    for match in _LINE.finditer(proc.stderr):
+        _, cumulative, indent, name = match.groups()
+        top = name.split(".")[0]
+        if top == "quizzly" or len(indent) == 1:
+            key = name if top == "quizzly" else top
+            packages[key] = max(packages.get(key, 0), int(cumulative) / 1000)
+    result["packages"] = packages
+    return result
+
+
+def main(args):
+    routers = args.routers
+    runs = [run_once(routers) for _ in range(args.runs)]
+    total = statistics.median(r["ms"] for r in runs)
+    packages = {}
+    for name in runs[-1]["packages"]:
+        packages[name] = statistics.median(r["packages"].get(name, 0) for r in runs)
+
+    print(f"create_app({routers}): median {total:.0f} ms over {args.runs} runs "
+          f"(min {min(r['ms'] for r in runs):.0f}, max {max(r['ms'] for r in runs):.0f})")
+    print(f"{'cumulative ms':>14}  import")
+    for name, ms in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{ms:14.1f}  {name}")
+
+    failures = []
+    loaded = set(runs[-1]["modules"])
+    eager = [m for m in args.lazy if m in loaded]
+    if eager:
+        failures.append(f"imported at startup but should load lazily: {', '.join(eager)}")
+    if args.budget_ms and total > args.budget_ms:
+        failures.append(f"median {total:.0f} ms is over the {args.budget_ms:.0f} ms budget")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--routers", nargs="+", default=["parent", "quiz", "content"])
+    parser.add_argument("--budget-ms", type=float, default=2000, help="0 disables the time budget")
+    parser.add_argument("--lazy", nargs="*", default=list(LAZY_MODULES), help="modules that must not load at startup")
+    parser.add_argument("--top", type=int, default=10)
+    main(parser.parse_args())
@@ -0,0 +1,277 @@
+"""
+End-to-end load test: one teacher registers, logs in and creates quizzes, then students
+start and submit each quiz while pollers hammer the leaderboard. Reports p50/p95/p99
+latency and throughput per route, and can save or compare against a JSON baseline.
+
+Without `--url` it starts `benchmarks.stubs` (fake Gemini/YouTube) and `benchmarks.serve`
+(the real app, on mongomock-motor unless `--mongodb-uri` is given) as subprocesses.
+
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.load_test --students 200 --save benchmarks/baselines/local.json
+    python -m benchmarks.load_test --students 200 --compare benchmarks/baselines/local.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import httpx
+
+
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.windows = {}
+
+    async def call(self, client: httpx.AsyncClient, route: str, method: str, url: str, **kwargs) -> httpx.Response:
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        finished = time.perf_counter()
+        self.latencies[route].append((finished - started) * 1000)
+        if response.status_code >= 400:
+            self.errors[route] += 1
+        first, last = self.windows.get(route, (started, finished))
+        self.windows[route] = (min(first, started), max(last, finished))
+        return response
+
+    def summary(self) -> dict:
+        routes = {}
+        for route, values in sorted(self.latencies.items()):
+            first, last = self.windows[route]
+            routes[route] = {
+                "count": len(values),
+                "errors": self.errors[route],
+                "rps": round(len(values) / max(last - first, 1e-9), 1),
+                "p50_ms": round(percentile(values, 50), 2),
+                "p95_ms": round(percentile(values, 95), 2),
+                "p99_ms": round(percentile(values, 99), 2),
+                "max_ms": round(max(values), 2),
+            }
+        return routes
+
+
+async def run_scenario(client: httpx.AsyncClient, args) -> Recorder:
+    recorder = Recorder()
+    credentials = {"username": f"bench-{uuid.uuid4().hex[:8]}", "password": "bench-password"}
+    await recorder.call(client, "POST /parent/register", "POST", "/parent/register",
+                        json={**credentials, "name": "Bench Teacher"})
+    response = await recorder.call(client, "POST /parent/login", "POST", "/parent/login", json=credentials)
+    response.raise_for_status()
+    auth = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    async def create(i: int) -> dict:
+        body = {
+            "name": f"Bench quiz {i}",
+            "subject": "Benchmarks",
+            "topic": f"topic {i % args.topics}",
+            "num_questions": args.questions,
+            "difficulty_level": 5
+        }
+        response = await recorder.call(client, "POST /quiz/quizzes/create", "POST", "/quiz/quizzes/create",
+                                       json=body, headers=auth)
+        response.raise_for_status()
+        return response.json()
+
+    quizzes = await asyncio.gather(*(create(i) for i in range(args.quizzes)))
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def play(quiz: dict, student: int):
+        quiz_id = quiz["_id"]
+        name = f"student-{student}"
+        answers = ["ABCD"[(student + i) % 4] for i in range(len(quiz["questions"]))]
+        async with semaphore:
+            await recorder.call(client, "POST /quiz/quizzes/start/{id}", "POST", f"/quiz/quizzes/start/{quiz_id}",
+                                json={"name": name, "password": quiz["password"]})
+            await asyncio.sleep(args.think_time)
+            await recorder.call(client, "POST /quiz/quizzes/{id}/submit_answers", "POST",
+                                f"/quiz/quizzes/{quiz_id}/submit_answers", json={"name": name, "answers": answers})
+
+    async def poll(quiz: dict, done: asyncio.Event):
+        while not done.is_set():
+            await recorder.call(client, "GET /quiz/quizzes/{id}/leaderboard", "GET",
+                                f"/quiz/quizzes/{quiz['_id']}/leaderboard", params={"limit": args.leaderboard_limit})
+            await asyncio.sleep(args.poll_interval)
+
+    async def search(i: int):
+        async with semaphore:
+            await recorder.call(client, "POST /content/youtube", "POST", "/content/youtube",
+                                json={"topics": [f"bench topic {uuid.uuid4().hex[:6]}-{i}"], "num_results": 5})
+
+    done = asyncio.Event()
+    pollers = [asyncio.create_task(poll(quiz, done)) for quiz in quizzes for _ in range(args.pollers)]
+    await asyncio.gather(
+        *(play(quiz, student) for quiz in quizzes for student in range(args.students)),
+        *(search(i) for i in range(args.youtube_searches))
+    )
+    done.set()
+    await asyncio.gather(*pollers)
+    return recorder
+
+
+async def wait_until_ready(url: str, timeout: float):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=url, timeout=2) as client:
+        while True:
+            try:
+                if (await client.get("/openapi.json")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+            await asyncio.sleep(0.2)
+
+
+def start_stack(args) -> list:
+    stubs_url = f"http://127.0.0.1:{args.stubs_port}"
+    stubs = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.stubs", "--port", str(args.stubs_port),
+        "--gemini-latency", str(args.gemini_latency),
+        "--youtube-latency", str(args.youtube_latency),
+        "--jitter", str(args.jitter),
+    ])
+
+    env = dict(os.environ)
+    env.update({
+        "GEMINI_BASE_URL": stubs_url,
+        "YOUTUBE_API_ENDPOINT": stubs_url,
+        "MONGODB_DB_NAME": args.db_name,
+    })
+    for key, value in {
+        "SECRET_KEY": "bench-secret-" + "0" * 32,
+        "FRONTEND_URL": "http://localhost:3000",
+        "CORS_ORIGINS": "http://localhost:3000",
+        "GEMINI_API_KEY": "bench-key",
+        "YOUTUBE_API_KEY": "bench-key",
+    }.items():
+        env.setdefault(key, value)
+    command = [sys.executable, "-m", "benchmarks.serve", "--port", str(args.app_port)]
+    if args.mongodb_uri:
+        env["MONGODB_URI"] = args.mongodb_uri
+    else:
+        env["MONGODB_URI"] = "mongodb://in-memory"
+        env.setdefault("QUIZ_JOB_BACKEND", "memory")
+        command.append("--in-memory")
+    app = subprocess.Popen(command, env=env)
+    return [stubs, app]
+
+
+def stop_stack(processes: list):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def print_report(routes: dict, baseline: dict = None):
+    header = f"{'route':42} {'count':>6} {'err':>4} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    print(header)
+    print("-" * len(header))
+    for route, stats in routes.items():
+        print(f"{route:42} {stats['count']:>6} {stats['errors']:>4} {stats['rps']:>8.1f} "
+              f"{stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f}")
+        previous = (baseline or {}).get(route)
+        if previous:
+            deltas = [
+                _delta(stats[key], previous[key]) for key in ("rps", "p50_ms", "p95_ms", "p99_ms")
+            ]
+            print(f"{'  vs baseline':42} {'':>6} {'':>4} {deltas[0]:>8} {deltas[1]:>9} {deltas[2]:>9} {deltas[3]:>9}")
+
+
+def _delta(current: float, previous: float) -> str:
+    if not previous:
+        return "n/a"
+    return f"{(current - previous) / previous * 100:+.0f}%"
+
+
+async def main(args):
+    processes = []
+    url = args.url
+    if url is None:
+        processes = start_stack(args)
+        url = f"http://127.0.0.1:{args.app_port}"
+    try:
+        await wait_until_ready(url, args.startup_timeout)
+        limits = httpx.Limits(max_connections=args.concurrency + args.quizzes * args.pollers + 1)
+        async with httpx.AsyncClient(base_url=url, limits=limits, timeout=120) as client:
+            started = time.perf_counter()
+            recorder = await run_scenario(client, args)
+            elapsed = time.perf_counter() - started
+    finally:
+        stop_stack(processes)
+
+    routes = recorder.summary()
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"comparing with {args.compare} (revision {baseline['meta'].get('revision') or 'unknown'})")
+    print_report(routes, baseline["routes"] if baseline else None)
+    print(f"\nscenario finished in {elapsed:.2f}s")
+
+    if args.save:
+        result = {
+            "meta": {
+                "revision": git_revision(),
+                "recorded_at": datetime.now(timezone.utc).isoformat(),
+                "backend": "mongodb" if args.mongodb_uri else "in-memory",
+                "elapsed_s": round(elapsed, 2),
+                "args": {key: value for key, value in vars(args).items() if key not in ("save", "compare")},
+            },
+            "routes": routes,
+        }
+        os.makedirs(os.path.dirname(args.save) or ".", exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"baseline written to {args.save}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="target an already running API instead of starting one")
+    parser.add_argument("--mongodb-uri", help="run the app on a real MongoDB instead of mongomock-motor")
+    parser.add_argument("--db-name", default="quizzly_bench")
+    parser.add_argument("--app-port", type=int, default=8800)
+    parser.add_argument("--stubs-port", type=int, default=8900)
+    parser.add_argument("--gemini-latency", type=float, default=0.5)
+    parser.add_argument("--youtube-latency", type=float, default=0.1)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--quizzes", type=int, default=4)
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--topics", type=int, default=2, help="distinct topics across the created quizzes")
+    parser.add_argument("--students", type=int, default=100, help="students per quiz")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--think-time", type=float, default=0.0, help="seconds between start and submit")
+    parser.add_argument("--pollers", type=int, default=2, help="leaderboard pollers per quiz")
+    parser.add_argument("--poll-interval", type=float, default=0.25)
+    parser.add_argument("--leaderboard-limit", type=int, default=20)
+    parser.add_argument("--youtube-searches", type=int, default=20)
+    parser.add_argument("--startup-timeout", type=float, default=30)
+    parser.add_argument("--save", help="write the results as a JSON baseline")
+    parser.add_argument("--compare", help="compare against a JSON baseline written by --save")
+    asyncio.run(main(parser.parse_args()))
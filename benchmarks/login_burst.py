@@ -0,0 +1,79 @@
+"""
+Login storm against a running Quizzly API.
+
+Fires `--logins` concurrent logins for one parent account while probing a cheap route
+in parallel, then reports login throughput and the probe latency. With bcrypt on the
+event loop the probe latency climbs to the length of the whole burst; with hashing
+offloaded it should stay close to its idle value.
+
+    uvicorn quizzly.main:app --port 8000
+    python -m benchmarks.login_burst --url http://localhost:8000 --logins 200
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+
+
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def probe(client: httpx.AsyncClient, path: str, stop: asyncio.Event, latencies: list):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get(path)
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(0.01)
+
+
+async def main(args):
+    limits = httpx.Limits(max_connections=args.concurrency + 1)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+        username = f"bench-{uuid.uuid4().hex[:8]}"
+        credentials = {"username": username, "password": "bench-password"}
+        response = await client.post("/parent/register", json={**credentials, "name": "Bench"})
+        response.raise_for_status()
+
+        idle = []
+        for _ in range(20):
+            started = time.perf_counter()
+            await client.get(args.probe)
+            idle.append((time.perf_counter() - started) * 1000)
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+        statuses = {}
+
+        async def login():
+            async with semaphore:
+                r = await client.post("/parent/login", json=credentials)
+                statuses[r.status_code] = statuses.get(r.status_code, 0) + 1
+
+        stop = asyncio.Event()
+        busy = []
+        prober = asyncio.create_task(probe(client, args.probe, stop, busy))
+        started = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(args.logins)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await prober
+
+    print(f"logins: {args.logins} in {elapsed:.2f}s -> {args.logins / elapsed:.1f} req/s, statuses {statuses}")
+    print(f"probe {args.probe} idle: p50 {statistics.median(idle):.1f} ms, p99 {percentile(idle, 99):.1f} ms")
+    print(f"probe {args.probe} during burst: p50 {statistics.median(busy):.1f} ms, "
+          f"p99 {percentile(busy, 99):.1f} ms, max {max(busy):.1f} ms ({len(busy)} samples)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--probe", default="/quiz/question-bank/stats")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,105 @@
+"""
+Serialization cost of the hot quiz payloads: a 100-question quiz and the leaderboard of
+500 responses to it, before (pydantic validation / jsonable_encoder + json) and after
+(ORJSONResponse on pre-validated data).
+
+    python -m benchmarks.serialization --repeat 20
+"""
+import argparse
+import json
+import random
+import timeit
+from datetime import datetime
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+
+from quizzly.core.responses import dumps
+from quizzly.models.quiz import Quiz
+
+NUM_QUESTIONS = 100
+NUM_RESPONSES = 500
+
+
+def make_quiz() -> dict:
+    quiz_id = str(ObjectId())
+    return {
+        "_id": quiz_id,
+        "name": "Benchmark quiz",
+        "subject": "Science",
+        "trigger_link": f"https://quizzly.example/take-quiz/{quiz_id}",
+        "num_questions": NUM_QUESTIONS,
+        "questions": [
+            {
+                "question": f"Question {i}: which of these statements is correct?",
+                "choice_A": f"Option A for {i}",
+                "choice_B": f"Option B for {i}",
+                "choice_C": f"Option C for {i}",
+                "choice_D": f"Option D for {i}",
+                "answer": random.choice("ABCD"),
+                "is_correct": False,
+            }
+            for i in range(NUM_QUESTIONS)
+        ],
+        "user_responses": [],
+        "taken_by": [],
+        "topic": "Physics",
+        "difficulty_level": 7,
+        "created_by": str(ObjectId()),
+        "created_at": datetime.now(),
+        "start_time": None,
+        "end_time": None,
+        "exec_time": None,
+        "is_started": False,
+        "is_executed": False,
+        "metadata_fields": {},
+        "password": 1234,
+    }
+
+
+def make_leaderboard(quiz: dict) -> list:
+    rows = []
+    for n in range(NUM_RESPONSES):
+        answers = [
+            {"question_index": i, "answer": random.choice("ABCD"), "is_correct": False}
+            for i in range(NUM_QUESTIONS)
+        ]
+        for ans in answers:
+            ans["is_correct"] = ans["answer"] == quiz["questions"][ans["question_index"]]["answer"]
+        score = sum(a["is_correct"] for a in answers)
+        rows.append({
+            "id": str(ObjectId()),
+            "name": f"student-{n}",
+            "score": score,
+            "percentage": round(score / NUM_QUESTIONS * 100),
+            "correctAnswers": score,
+            "incorrectAnswers": NUM_QUESTIONS - score,
+            "timeTaken": "12m 3s",
+            "timeTakenSeconds": 723.4,
+            "attemptedAt": datetime.now().isoformat(),
+            "answers": answers,
+        })
+    return rows
+
+
+def main(args):
+    quiz = make_quiz()
+    leaderboard = make_leaderboard(quiz)
+
+    cases = {
+        "quiz: Quiz validation + jsonable_encoder + json": lambda: json.dumps(
+            jsonable_encoder(Quiz(**quiz).model_dump(by_alias=True))).encode(),
+        "quiz: orjson": lambda: dumps(quiz),
+        "leaderboard: jsonable_encoder + json": lambda: json.dumps(jsonable_encoder(leaderboard)).encode(),
+        "leaderboard: orjson": lambda: dumps(leaderboard),
+    }
+    print(f"{NUM_QUESTIONS} questions, {NUM_RESPONSES} responses; best of 3 x {args.repeat} runs")
+    for name, fn in cases.items():
+        best = min(timeit.repeat(fn, number=args.repeat, repeat=3)) / args.repeat
+        print(f"  {name:<50} {best * 1000:9.2f} ms  ({len(fn()) / 1024:.0f} KiB)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    main(parser.parse_args())
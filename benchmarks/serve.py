@@ -0,0 +1,31 @@
+"""
+Boot the real `quizzly.main:app` for benchmarking, optionally on an in-memory database.
+
+With `--in-memory` Motor is swapped for mongomock-motor before the app is imported, so
+no MongoDB server is needed; numbers from that backend are only comparable with each
+other, not with a real deployment. Point GEMINI_BASE_URL / YOUTUBE_API_ENDPOINT at
+`benchmarks.stubs` to keep the providers local too.
+
+    python -m benchmarks.serve --port 8800 --in-memory
+"""
+import argparse
+
+import uvicorn
+
+
+def use_in_memory_mongo():
+    import motor.motor_asyncio
+    from mongomock_motor import AsyncMongoMockClient
+
+    motor.motor_asyncio.AsyncIOMotorClient = AsyncMongoMockClient
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--in-memory", action="store_true", help="run on mongomock-motor instead of MONGODB_URI")
+    args = parser.parse_args()
+    if args.in_memory:
+        use_in_memory_mongo()
+    uvicorn.run("quizzly.main:app", host=args.host, port=args.port, log_level="warning")
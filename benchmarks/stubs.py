@@ -0,0 +1,109 @@
+"""
+Local stand-ins for the Gemini and YouTube APIs used by the load test.
+
+Both answer with deterministic fixtures after a configurable delay, so a benchmark run
+measures Quizzly rather than the upstream providers or the network to them.
+
+    python -m benchmarks.stubs --port 8900 --gemini-latency 0.5 --youtube-latency 0.1
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+PROMPT_COUNT = re.compile(r"creating (\d+) Multiple")
+
+
+def _delay(mean: float, jitter: float) -> float:
+    return max(0.0, random.uniform(mean - jitter, mean + jitter))
+
+
+def fake_questions(count: int, topic: str = "benchmarks") -> list:
+    return [
+        {
+            "question": f"{topic} question {i}?",
+            "choice_A": "alpha",
+            "choice_B": "beta",
+            "choice_C": "gamma",
+            "choice_D": "delta",
+            "answer": "ABCD"[i % 4],
+            "is_correct": False
+        }
+        for i in range(count)
+    ]
+
+
+def _requested_questions(body: dict) -> int:
+    prompt = body["contents"][0]["parts"][0]["text"]
+    match = PROMPT_COUNT.search(prompt)
+    return int(match.group(1)) if match else 5
+
+
+def _candidate(text: str) -> dict:
+    return {"candidates": [{"content": {"parts": [{"text": text}]}}]}
+
+
+def create_app(gemini_latency: float = 0.5, youtube_latency: float = 0.1, jitter: float = 0.0) -> Starlette:
+    async def generate(request: Request):
+        model_call = request.path_params["model_call"]
+        body = await request.json()
+        text = json.dumps({"questions": fake_questions(_requested_questions(body))})
+
+        if model_call.endswith(":streamGenerateContent"):
+            chunks = [text[i:i + 64] for i in range(0, len(text), 64)]
+            per_chunk = _delay(gemini_latency, jitter) / max(len(chunks), 1)
+
+            async def events():
+                for chunk in chunks:
+                    await asyncio.sleep(per_chunk)
+                    yield f"data: {json.dumps(_candidate(chunk))}\r\n\r\n"
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        await asyncio.sleep(_delay(gemini_latency, jitter))
+        return JSONResponse(_candidate(f"```json\n{text}\n```"))
+
+    async def youtube_search(request: Request):
+        await asyncio.sleep(_delay(youtube_latency, jitter))
+        query = request.query_params.get("q", "")
+        count = int(request.query_params.get("maxResults", 5))
+        items = [
+            {
+                "id": {"kind": "youtube#video", "videoId": f"stub{i:07d}"},
+                "snippet": {
+                    "title": f"{query} video {i}",
+                    "description": f"About {query}",
+                    "thumbnails": {"high": {"url": f"https://img.example/{i}.jpg"}}
+                }
+            }
+            for i in range(count)
+        ]
+        return JSONResponse({"kind": "youtube#searchListResponse", "items": items})
+
+    async def health(request: Request):
+        return Response(status_code=204)
+
+    return Starlette(routes=[
+        Route("/v1beta/models/{model_call:path}", generate, methods=["POST"]),
+        Route("/youtube/v3/search", youtube_search, methods=["GET"]),
+        Route("/health", health),
+    ])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--gemini-latency", type=float, default=0.5, help="seconds per generation call")
+    parser.add_argument("--youtube-latency", type=float, default=0.1, help="seconds per search call")
+    parser.add_argument("--jitter", type=float, default=0.0, help="uniform +/- seconds added to each delay")
+    args = parser.parse_args()
+    app = create_app(args.gemini_latency, args.youtube_latency, args.jitter)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
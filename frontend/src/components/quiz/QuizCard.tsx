@@ -44,6 +44,7 @@ const QuizCard = ({ quiz, onDelete }: QuizCardProps) => {
   const [showResultModal, setShowResultModal] = useState(false);
   const [showLeaderboardModal, setShowLeaderboardModal] = useState(false);
   const [showEditModal, setShowEditModal] = useState(false);
+  const [questions, setQuestions] = useState<any[]>([]);
 
   // This would normally come from an API, this is sample data
   const sampleResult = {
@@ -151,6 +152,25 @@ const QuizCard = ({ quiz, onDelete }: QuizCardProps) => {
     }, 2000);
   };
 
+  // The quiz listing only carries summaries, load the questions when editing
+  const handleOpenEditModal = async () => {
+    try {
+      const userInfo = localStorage.getItem("user");
+      const user = JSON.parse(userInfo || "{}");
+      // Authenticated as the owner, the response includes the answers
+      const response = await api.get(`/quiz/quizzes/${quiz._id}`, {
+        headers: {
+          Authorization: `Bearer ${user.access_token}`
+        }
+      });
+      setQuestions(response.data.questions || []);
+      setShowEditModal(true);
+    } catch (error) {
+      console.error("Error loading quiz questions:", error);
+      toast.error("Failed to load quiz questions. Please try again.");
+    }
+  };
+
   const handleDeleteQuiz = async () => {
     console.log(quiz);
     
@@ -313,7 +333,7 @@ const QuizCard = ({ quiz, onDelete }: QuizCardProps) => {
           <Button
             variant="ghost"
             size="sm"
-            onClick={() => setShowEditModal(true)}
+            onClick={handleOpenEditModal}
             className="flex items-center gap-1"
           >
             <Pencil className="h-4 w-4" />
@@ -351,7 +371,7 @@ const QuizCard = ({ quiz, onDelete }: QuizCardProps) => {
         open={showEditModal}
         onOpenChange={setShowEditModal}
         quizName={quiz.name}
-        questions={quiz.questions}
+        questions={questions}
         onSave={handleSaveQuestions}
       />
     </Card>
@@ -24,31 +24,30 @@ const QuizPassword = ({ quizId, quizName, password, onPasswordVerified }: QuizPa
   const handleVerifyPassword = async () => {
     setIsChecking(true);
 
-    console.log(quizId, password);
-    
-    if (enteredPassword == password) {
-      try {
-        const response = await api.post(
-          `/quiz/quizzes/start/${quizId}`,
-          {
-            password: enteredPassword,
-            name: enteredName,
-          }
-        );
+    // The password is checked by the server, the player view of the quiz does not include it
+    try {
+      const response = await api.post(
+        `/quiz/quizzes/start/${quizId}`,
+        {
+          password: enteredPassword,
+          name: enteredName,
+        }
+      );
 
-        console.log(response);
-        
+      console.log(response);
+      
 
-        if (response.status === 200) {
-          toast.success("Quiz started successfully!");
-          onPasswordVerified(enteredName); // Pass name to parent
-        }
-      } catch (error) {
+      if (response.status === 200) {
+        toast.success("Quiz started successfully!");
+        onPasswordVerified(enteredName); // Pass name to parent
+      }
+    } catch (error) {
+      if (axios.isAxiosError(error) && error.response?.status === 401) {
+        toast.error("Incorrect password. Please try again.");
+      } else {
         console.error("Error starting the quiz:", error);
         toast.error("Failed to start the quiz. Please try again.");
       }
-    } else {
-      toast.error("Incorrect password. Please try again.");
     }
 
     setIsChecking(false);
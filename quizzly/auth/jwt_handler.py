@@ -1,20 +1,64 @@
-from jose import jwt
-from datetime import datetime, timedelta
-from dotenv import load_dotenv
-import os
+# app/auth/jwt_handler.py
+import time
+from datetime import datetime, timezone, timedelta
+from typing import Optional
+import jwt
+from fastapi import Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordBearer
+from quizzly.core.config import settings
+from quizzly.utils.cache import TTLCache
 
-load_dotenv()
-
-SECRET_KEY = os.getenv("SECRET_KEY")
+SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = "HS256"
+ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
+
+# Tokens whose signature was already checked, each kept until it expires, so repeat
+# requests with the same bearer token skip HMAC verification
+_verified_tokens = TTLCache(maxsize=settings.TOKEN_CACHE_MAX_ENTRIES, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
 
 
-def create_access_token(data: dict, expires_delta: timedelta = timedelta(days=1)):
+def create_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
-    expire = datetime.utcnow() + expires_delta
+    if expires_delta:
+        expire = datetime.now(timezone.utc) + expires_delta
+    else:
+        expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def decode_access_token(token: str):
-    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+def verify_token(token: str) -> Optional[dict]:
+    payload = _verified_tokens.get(token)
+    if payload is not None:
+        return payload
+    try:
+        # Checks the signature and the exp claim
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], options={"require": ["exp"]})
+    except jwt.InvalidTokenError:
+        return None
+    remaining = payload["exp"] - time.time()
+    if remaining > 0:
+        _verified_tokens.set(token, payload, ttl=remaining)
+    return payload
+
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
+
+
+# Async so FastAPI calls them on the event loop: a threadpool hop costs more than the
+# check itself, and the token cache is not thread-safe
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:
+    user = verify_token(token)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
+
+
+async def get_optional_user(token: Optional[str] = Depends(optional_oauth2_scheme)) -> Optional[dict]:
+    """Like get_current_user, but None instead of 401 for anonymous or invalid tokens."""
+    return verify_token(token) if token else None
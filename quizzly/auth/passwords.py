@@ -0,0 +1,62 @@
+# app/auth/passwords.py
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+import bcrypt
+from fastapi import HTTPException
+from quizzly.core.config import settings
+
+# bcrypt releases the GIL while hashing, so a small thread pool keeps the event loop
+# free; `_pending` counts queued + running jobs to shed load when the pool is saturated
+_executor: Optional[ThreadPoolExecutor] = None
+_pending = 0
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+    return _executor
+
+
+def _hash(password: bytes, rounds: int) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds))
+
+
+async def _run(fn, *args):
+    global _pending
+    if _pending >= settings.PASSWORD_HASH_MAX_PENDING:
+        raise HTTPException(
+            status_code=503,
+            detail="Server busy, please retry",
+            headers={"Retry-After": "1"},
+        )
+    _pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_executor(), fn, *args)
+    finally:
+        _pending -= 1
+
+
+async def hash_password(password: str) -> str:
+    hashed = await _run(_hash, password.encode(), settings.BCRYPT_ROUNDS)
+    return hashed.decode()
+
+
+async def verify_password(password: str, hashed: str) -> bool:
+    return await _run(bcrypt.checkpw, password.encode(), hashed.encode())
+
+
+def needs_rehash(hashed: str) -> bool:
+    # bcrypt hashes look like $2b$<cost>$<salt+hash>
+    try:
+        return int(hashed.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -1,4 +1,8 @@
 # app/core/config.py
+import os
+import tempfile
+from functools import lru_cache
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 
@@ -10,8 +14,115 @@ class Settings(BaseSettings):
     YOUTUBE_API_KEY: str
     CORS_ORIGINS: str
 
+    # Move quiz responses still embedded in quiz documents into db.submissions at
+    # startup. Idempotent; until it has run, those quizzes show empty leaderboards.
+    # Disable only after running `python -m quizzly.db.submissions` once
+    MIGRATE_ON_STARTUP: bool = True
+
+    # MongoDB connection pool
+    MONGODB_DB_NAME: str = "quiz_app"
+    MONGODB_MAX_POOL_SIZE: int = 100
+    MONGODB_MIN_POOL_SIZE: int = 10
+    MONGODB_MAX_IDLE_TIME_MS: int = 5 * 60 * 1000
+    MONGODB_CONNECT_TIMEOUT_MS: int = 5000
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    MONGODB_SOCKET_TIMEOUT_MS: int = 20000
+    MONGODB_COMPRESSORS: str = "zstd,snappy,zlib"
+
+    # Access tokens
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 300
+    TOKEN_CACHE_MAX_ENTRIES: int = 10000
+
+    # Password hashing
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
+
+    # Gemini HTTP client
+    GEMINI_BASE_URL: str = "https://generativelanguage.googleapis.com"
+    GEMINI_MODEL: str = "gemini-2.0-flash"
+    GEMINI_CONNECT_TIMEOUT: float = 5.0
+    GEMINI_READ_TIMEOUT: float = 60.0
+    GEMINI_MAX_CONNECTIONS: int = 20
+
+    # Large quizzes are generated as concurrent chunks of at most GEMINI_CHUNK_SIZE questions
+    GEMINI_CHUNK_SIZE: int = 10
+    GEMINI_CHUNK_CONCURRENCY: int = 5
+    GEMINI_CHUNK_RETRIES: int = 2
+    GEMINI_RETRY_BASE_DELAY: float = 0.5
+
+    # Question bank cache
+    QUESTION_BANK_TTL_SECONDS: int = 60 * 60 * 24 * 30
+    QUESTION_BANK_MAX_PER_KEY: int = 500
+    # Share of a quiz served from the bank; the rest is generated fresh. A key holding
+    # QUESTION_BANK_FULL_MULTIPLE times the requested count can serve the whole quiz
+    QUESTION_BANK_MAX_SHARE: float = 0.5
+    QUESTION_BANK_FULL_MULTIPLE: int = 5
+
+    # Near-duplicate question detection (MinHash/LSH over question text and choices)
+    SIMILARITY_THRESHOLD: float = 0.6
+    SIMILARITY_INDEX_TTL_SECONDS: int = 60 * 60
+    SIMILARITY_INDEX_MAX_TOPICS: int = 256
+
+    # Background quiz generation jobs
+    QUIZ_JOB_BACKEND: str = "mongo"  # "mongo" or "memory"
+    QUIZ_JOB_WORKERS: int = 4  # per process
+    QUIZ_JOB_MAX_PER_USER: int = 2
+    QUIZ_JOB_POLL_INTERVAL: float = 1.0
+    QUIZ_JOB_LEASE_SECONDS: int = 300
+
+    # Content providers (DuckDuckGo / YouTube)
+    YOUTUBE_API_ENDPOINT: Optional[str] = None  # override, e.g. for local stand-ins
+    CONTENT_MAX_CONCURRENCY: int = 8
+    CONTENT_CACHE_TTL_SECONDS: int = 60 * 60 * 6
+    CONTENT_CACHE_MAX_ENTRIES: int = 2048
+
+    # Per-quiz answer keys cached for grading
+    ANSWER_KEY_CACHE_TTL_SECONDS: int = 300
+    ANSWER_KEY_CACHE_MAX_ENTRIES: int = 1024
+
+    # Quiz document cache for GET /quiz/quizzes/{id}
+    QUIZ_CACHE_TTL_SECONDS: int = 30
+    QUIZ_CACHE_MAX_ENTRIES: int = 2048
+
+    # Quiz analytics cache
+    ANALYTICS_CACHE_TTL_SECONDS: int = 600
+    ANALYTICS_CACHE_MAX_ENTRIES: int = 1024
+
+    # Live quiz events (SSE / WebSocket)
+    EVENTS_HEARTBEAT_SECONDS: float = 15.0
+
+    # Prometheus metrics at /metrics (request, MongoDB command and provider timings)
+    METRICS_ENABLED: bool = True
+    # Fraction of MongoDB replies whose first document is re-encoded to record its size
+    METRICS_DOCUMENT_SIZE_SAMPLE_RATE: float = 0.01
+
+    # Opt-in request profiler; profiles are listed and downloaded from /admin/profiles
+    ADMIN_TOKEN: Optional[str] = None
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_SLOW_THRESHOLD_MS: float = 1000.0
+    PROFILING_INTERVAL_MS: float = 5.0
+    PROFILING_DIR: str = os.path.join(tempfile.gettempdir(), "quizzly-profiles")
+    PROFILING_MAX_FILES: int = 50
+
+    # Live sessions: active quizzes are graded in memory and written back in batches
+    LIVE_FLUSH_INTERVAL_SECONDS: float = 0.5
+    LIVE_FLUSH_BATCH_SIZE: int = 500
+    LIVE_SESSION_IDLE_SECONDS: int = 15 * 60
+
     class Config:
         env_file = ".env"
 
 
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    return Settings()
+
+
+def __getattr__(name):
+    # `settings` is built from the environment on first use, not when this module is
+    # imported, and then shared by every module that imports it
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,156 @@
+# app/core/middleware.py
+import asyncio
+import hmac
+import logging
+import random
+import threading
+import time
+from typing import Optional
+
+from starlette.routing import compile_path
+
+from quizzly.utils import metrics, profiler
+
+logger = logging.getLogger(__name__)
+
+REQUEST_DURATION = metrics.histogram(
+    "http_request_duration_seconds",
+    "Time to complete HTTP requests, by route template.",
+    ("method", "route", "status"),
+)
+REQUESTS_IN_FLIGHT = metrics.gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being served, by route template.",
+    ("method", "route"),
+)
+
+
+class RouteTemplates:
+    """
+    Maps request paths to route templates ("/quiz/quizzes/{quiz_id}") using the app's
+    OpenAPI paths, which carry the full prefixed templates whatever the router layout.
+    Built on first use; raw paths would explode the label cardinality.
+    """
+
+    def __init__(self):
+        self._patterns = None
+
+    def _build(self, app):
+        templates = sorted(app.openapi().get("paths", {}), key=lambda path: (path.count("{"), path))
+        return [(compile_path(template)[0], template) for template in templates]
+
+    def resolve(self, scope) -> str:
+        if self._patterns is None:
+            self._patterns = self._build(scope["app"])
+        path = scope["path"]
+        for pattern, template in self._patterns:
+            if pattern.match(path):
+                return template
+        return "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Records latency and in-flight requests per route template. Streaming responses
+    (SSE, exports) are timed until their last chunk; WebSockets and scrapes of
+    /metrics itself are not recorded.
+    """
+
+    def __init__(self, app, skip_paths=("/metrics",)):
+        self.app = app
+        self.skip_paths = set(skip_paths)
+        self.templates = RouteTemplates()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = self.templates.resolve(scope)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc(method=method, route=route)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec(method=method, route=route)
+            REQUEST_DURATION.observe(
+                time.perf_counter() - started,
+                method=method,
+                route=route,
+                status=str(status),
+            )
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+class ProfilingMiddleware:
+    """
+    Samples the stack of a `sample_rate` fraction of requests, plus any request whose
+    X-Profile header carries the admin token. Sampled profiles are kept only if the
+    request took at least `slow_threshold_ms`; requested ones are always kept.
+    """
+
+    def __init__(self, app, store: profiler.ProfileStore, sample_rate: float = 0.0,
+                 slow_threshold_ms: float = 1000.0, interval_ms: float = 5.0, token: Optional[str] = None):
+        self.app = app
+        self.store = store
+        self.sample_rate = sample_rate
+        self.slow_threshold_ms = slow_threshold_ms
+        self.token = token
+        self.sampler = profiler.Sampler(interval_ms / 1000)
+
+    def _requested(self, scope) -> bool:
+        value = _header(scope, b"x-profile")
+        return self.token is not None and value is not None and hmac.compare_digest(value, self.token)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        requested = self._requested(scope)
+        if not requested and (self.sample_rate <= 0 or random.random() >= self.sample_rate):
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        profile = profiler.Profile(asyncio.current_task(), threading.get_ident(), {
+            "method": scope["method"],
+            "path": scope["path"],
+            "trigger": "header" if requested else "sample",
+            "started_at": time.time(),
+        })
+        started = time.perf_counter()
+        self.sampler.start(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.sampler.stop(profile)
+            duration_ms = (time.perf_counter() - started) * 1000
+            data = profile.close()
+            if requested or duration_ms >= self.slow_threshold_ms:
+                data.update(duration_ms=round(duration_ms, 3), status=status)
+                try:
+                    await asyncio.to_thread(self.store.save, data)
+                except OSError:
+                    logger.exception("Could not save profile %s", data["id"])
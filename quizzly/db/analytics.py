@@ -0,0 +1,153 @@
+# app/db/analytics.py
+from typing import List
+from quizzly.core.config import settings
+from quizzly.db import submissions
+from quizzly.db.mongodb import db
+from quizzly.utils.cache import TTLCache
+
+# Score histogram buckets, in percent of the questions answered correctly
+PERCENTAGE_BUCKETS = [0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 101]
+
+# Results per ("quiz", quiz_id) and ("owner", created_by); dropped on new submissions
+# and new quizzes
+_cache = TTLCache(maxsize=settings.ANALYTICS_CACHE_MAX_ENTRIES, ttl=settings.ANALYTICS_CACHE_TTL_SECONDS)
+_owners = TTLCache(maxsize=settings.ANALYTICS_CACHE_MAX_ENTRIES * 10, ttl=settings.ANALYTICS_CACHE_TTL_SECONDS)
+
+
+def invalidate_quiz(quiz_id: str):
+    _cache.pop(("quiz", quiz_id))
+    owner = _owners.get(quiz_id)
+    if owner is not None:
+        _cache.pop(("owner", owner))
+
+
+def invalidate_owner(created_by: str):
+    _cache.pop(("owner", created_by))
+
+
+async def _question_stats(quiz_id: str) -> List[dict]:
+    cursor = submissions.collection.aggregate([
+        {"$match": {"quiz_id": quiz_id, "submitted": True}},
+        {"$unwind": "$answers"},
+        {"$group": {
+            "_id": "$answers.question_index",
+            "attempts": {"$sum": 1},
+            "correct": {"$sum": {"$cond": ["$answers.is_correct", 1, 0]}},
+        }},
+        {"$sort": {"_id": 1}},
+    ])
+    return [
+        {
+            "question_index": row["_id"],
+            "attempts": row["attempts"],
+            "correct": row["correct"],
+            "correct_rate": round(row["correct"] / row["attempts"], 4) if row["attempts"] else 0,
+        }
+        async for row in cursor
+    ]
+
+
+async def _summary(quiz_id: str) -> dict:
+    rows = await submissions.collection.aggregate([
+        {"$match": {"quiz_id": quiz_id}},
+        {"$group": {
+            "_id": None,
+            "participants": {"$sum": 1},
+            "submissions": {"$sum": {"$cond": ["$submitted", 1, 0]}},
+            "avg_score": {"$avg": {"$cond": ["$submitted", "$score", None]}},
+            "min_score": {"$min": {"$cond": ["$submitted", "$score", None]}},
+            "max_score": {"$max": {"$cond": ["$submitted", "$score", None]}},
+            "avg_exec_time": {"$avg": "$exec_time"},
+        }},
+        {"$project": {"_id": 0}},
+    ]).to_list(1)
+    return rows[0] if rows else {
+        "participants": 0, "submissions": 0, "avg_score": None,
+        "min_score": None, "max_score": None, "avg_exec_time": None,
+    }
+
+
+async def _score_histogram(quiz_id: str, total_questions: int) -> List[dict]:
+    if total_questions <= 0:
+        return []
+    cursor = submissions.collection.aggregate([
+        {"$match": {"quiz_id": quiz_id, "submitted": True}},
+        {"$bucket": {
+            "groupBy": {"$multiply": [{"$divide": ["$score", total_questions]}, 100]},
+            "boundaries": PERCENTAGE_BUCKETS,
+            "default": "other",
+            "output": {"count": {"$sum": 1}},
+        }},
+    ])
+    counts = {row["_id"]: row["count"] async for row in cursor}
+    return [
+        {"from": low, "to": min(high, 100), "count": counts.get(low, 0)}
+        for low, high in zip(PERCENTAGE_BUCKETS, PERCENTAGE_BUCKETS[1:])
+    ]
+
+
+async def quiz_analytics(quiz: dict) -> dict:
+    quiz_id = quiz["_id"]
+
+    async def load():
+        total_questions = len(quiz.get("questions", []))
+        return {
+            "quiz_id": quiz_id,
+            "total_questions": total_questions,
+            **await _summary(quiz_id),
+            "questions": await _question_stats(quiz_id),
+            "score_distribution": await _score_histogram(quiz_id, total_questions),
+        }
+
+    _owners.set(quiz_id, quiz["created_by"])
+    return await _cache.get_or_load(("quiz", quiz_id), load)
+
+
+async def owner_analytics(created_by: str) -> dict:
+    async def load():
+        quiz_list = await db.quizzes.find(
+            {"created_by": created_by},
+            {"name": 1, "subject": 1, "topic": 1, "num_questions": 1}
+        ).to_list(None)
+        for quiz in quiz_list:
+            _owners.set(quiz["_id"], created_by)
+
+        per_quiz = {}
+        if quiz_list:
+            cursor = submissions.collection.aggregate([
+                {"$match": {"quiz_id": {"$in": [q["_id"] for q in quiz_list]}, "submitted": True}},
+                {"$group": {
+                    "_id": "$quiz_id",
+                    "submissions": {"$sum": 1},
+                    "avg_score": {"$avg": "$score"},
+                    "avg_exec_time": {"$avg": "$exec_time"},
+                }},
+            ])
+            per_quiz = {row["_id"]: row async for row in cursor}
+
+        quizzes_out = []
+        total_submissions = 0
+        for quiz in quiz_list:
+            row = per_quiz.get(quiz["_id"], {})
+            num_questions = quiz.get("num_questions") or 0
+            avg_score = row.get("avg_score")
+            total_submissions += row.get("submissions", 0)
+            quizzes_out.append({
+                "quiz_id": quiz["_id"],
+                "name": quiz.get("name"),
+                "subject": quiz.get("subject"),
+                "topic": quiz.get("topic"),
+                "submissions": row.get("submissions", 0),
+                "avg_score": avg_score,
+                "avg_percentage": round(avg_score / num_questions * 100, 2)
+                if avg_score is not None and num_questions else None,
+                "avg_exec_time": row.get("avg_exec_time"),
+            })
+        return {
+            "created_by": created_by,
+            "quizzes": len(quiz_list),
+            "submissions": total_submissions,
+            "per_quiz": quizzes_out,
+        }
+
+    return await _cache.get_or_load(("owner", created_by), load)
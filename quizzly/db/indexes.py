@@ -0,0 +1,38 @@
+# app/db/indexes.py
+import asyncio
+import logging
+from pymongo import ASCENDING
+from pymongo.errors import OperationFailure
+from quizzly.db.mongodb import db
+
+logger = logging.getLogger(__name__)
+
+
+async def ensure_parent_indexes():
+    try:
+        await db.parents.create_index([("username", ASCENDING)], unique=True)
+    except OperationFailure:
+        # Existing duplicate usernames; fall back to a plain index until they are cleaned up
+        logger.exception("Could not create unique index on parents.username")
+        await db.parents.create_index([("username", ASCENDING)], name="username_lookup")
+
+
+async def ensure_quiz_indexes():
+    # Imported here so an app without the quiz router does not load the quiz modules
+    from quizzly.db import question_index, quizzes, submissions
+    from quizzly.utils import question_bank
+
+    await quizzes.ensure_indexes()
+    await submissions.ensure_indexes()
+    await question_bank.ensure_indexes()
+    await question_index.ensure_indexes()
+
+
+async def ensure_indexes():
+    """Create every index the routes rely on; create_index is a no-op when it exists."""
+    await ensure_parent_indexes()
+    await ensure_quiz_indexes()
+
+
+if __name__ == "__main__":
+    asyncio.run(ensure_indexes())
@@ -1,6 +1,62 @@
 # app/db/mongodb.py
+import asyncio
+import logging
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import PyMongoError
 from quizzly.core.config import settings
+from quizzly.db.monitoring import CommandMetrics
 
-client = AsyncIOMotorClient(settings.MONGODB_URI)
-db = client.quiz_app
\ No newline at end of file
+logger = logging.getLogger(__name__)
+
+
+def _available_compressors() -> str:
+    # zstd and snappy need optional packages, zlib is always there
+    wanted = [c.strip() for c in settings.MONGODB_COMPRESSORS.split(",") if c.strip()]
+    available = []
+    for compressor in wanted:
+        module = {"zstd": "zstandard", "snappy": "snappy"}.get(compressor)
+        if module is not None:
+            try:
+                __import__(module)
+            except ImportError:
+                continue
+        available.append(compressor)
+    return ",".join(available)
+
+
+# Motor does no I/O until the first operation, so building the client here is cheap;
+# connect() and close() are driven by the app lifespan
+client = AsyncIOMotorClient(
+    settings.MONGODB_URI,
+    maxPoolSize=settings.MONGODB_MAX_POOL_SIZE,
+    minPoolSize=settings.MONGODB_MIN_POOL_SIZE,
+    maxIdleTimeMS=settings.MONGODB_MAX_IDLE_TIME_MS,
+    connectTimeoutMS=settings.MONGODB_CONNECT_TIMEOUT_MS,
+    serverSelectionTimeoutMS=settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+    socketTimeoutMS=settings.MONGODB_SOCKET_TIMEOUT_MS,
+    compressors=_available_compressors() or None,
+    event_listeners=[
+        CommandMetrics(document_size_sample_rate=settings.METRICS_DOCUMENT_SIZE_SAMPLE_RATE)
+    ] if settings.METRICS_ENABLED else [],
+)
+db = client[settings.MONGODB_DB_NAME]
+
+
+async def connect(retries: int = 3):
+    """Ping the server, then open `MONGODB_MIN_POOL_SIZE` connections up front."""
+    for attempt in range(1, retries + 1):
+        try:
+            await client.admin.command("ping")
+            break
+        except PyMongoError:
+            if attempt == retries:
+                raise
+            logger.warning("MongoDB ping failed (attempt %d/%d), retrying", attempt, retries)
+            await asyncio.sleep(attempt)
+    await asyncio.gather(
+        *(client.admin.command("ping") for _ in range(settings.MONGODB_MIN_POOL_SIZE))
+    )
+
+
+def close():
+    client.close()
@@ -0,0 +1,90 @@
+# app/db/monitoring.py
+import random
+import threading
+
+import bson
+from pymongo import monitoring
+
+from quizzly.utils import metrics
+
+COMMAND_DURATION = metrics.histogram(
+    "mongodb_command_duration_seconds",
+    "Round trip time of MongoDB commands, by collection and command.",
+    ("collection", "command"),
+)
+COMMAND_FAILURES = metrics.counter(
+    "mongodb_command_failures_total",
+    "MongoDB commands that returned an error, by collection and command.",
+    ("collection", "command"),
+)
+DOCUMENTS_RETURNED = metrics.histogram(
+    "mongodb_documents_returned",
+    "Documents returned per reply batch, by collection and command.",
+    ("collection", "command"),
+    buckets=(0, 1, 5, 10, 50, 100, 500, 1000, 5000),
+)
+DOCUMENT_SIZE = metrics.histogram(
+    "mongodb_document_size_bytes",
+    "BSON size of the first document of sampled reply batches, by collection and command.",
+    ("collection", "command"),
+    buckets=metrics.SIZE_BUCKETS,
+)
+
+# Commands whose first field names the collection they act on
+_COLLECTION_COMMANDS = {
+    "find", "insert", "update", "delete", "aggregate", "count", "distinct",
+    "findAndModify", "createIndexes", "listIndexes", "drop",
+}
+
+
+def _collection(command_name: str, command) -> str:
+    if command_name in _COLLECTION_COMMANDS:
+        return str(command.get(command_name, ""))
+    if command_name == "getMore":
+        return str(command.get("collection", ""))
+    return ""
+
+
+def _returned_documents(reply) -> list:
+    cursor = reply.get("cursor")
+    if cursor is not None:
+        return cursor.get("firstBatch", cursor.get("nextBatch", []))
+    if "value" in reply:
+        return [reply["value"]] if reply["value"] is not None else []
+    return []
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """
+    Times every command sent to MongoDB. Callbacks run on the driver's threads, so the
+    collection seen at start is kept per request id until the reply arrives. Document
+    sizes cost a re-encode, so only the first document of a `document_size_sample_rate`
+    fraction of replies is measured.
+    """
+
+    def __init__(self, document_size_sample_rate: float = 0.0):
+        self.document_size_sample_rate = document_size_sample_rate
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = _collection(event.command_name, event.command)
+
+    def _finish(self, event) -> str:
+        with self._lock:
+            return self._pending.pop((event.connection_id, event.request_id), "")
+
+    def succeeded(self, event):
+        labels = {"collection": self._finish(event), "command": event.command_name}
+        COMMAND_DURATION.observe(event.duration_micros / 1e6, **labels)
+        documents = _returned_documents(event.reply)
+        if documents or event.command_name in ("find", "getMore", "aggregate", "findAndModify"):
+            DOCUMENTS_RETURNED.observe(len(documents), **labels)
+        if documents and random.random() < self.document_size_sample_rate:
+            DOCUMENT_SIZE.observe(len(bson.encode(documents[0])), **labels)
+
+    def failed(self, event):
+        labels = {"collection": self._finish(event), "command": event.command_name}
+        COMMAND_DURATION.observe(event.duration_micros / 1e6, **labels)
+        COMMAND_FAILURES.inc(**labels)
@@ -0,0 +1,149 @@
+# app/db/question_index.py
+import asyncio
+import hashlib
+from datetime import datetime
+from typing import List, Optional
+
+import numpy as np
+from bson import Binary
+from pymongo import ASCENDING, UpdateOne
+
+from quizzly.core.config import settings
+from quizzly.db.mongodb import db
+from quizzly.utils import metrics, similarity
+from quizzly.utils.cache import TTLCache
+
+# One MinHash signature per distinct question (text + choices) per subject/topic,
+# kept next to the quizzes so near-duplicates can be found without an embedding service
+collection = db.question_signatures
+
+# In-process LSH index per subject/topic, loaded from the collection on first use
+_indexes = TTLCache(
+    maxsize=settings.SIMILARITY_INDEX_MAX_TOPICS,
+    ttl=settings.SIMILARITY_INDEX_TTL_SECONDS,
+)
+
+REJECTED = metrics.counter(
+    "near_duplicate_questions_total",
+    "Questions dropped as near-duplicates, by where the match was (quiz or index).",
+    ("match",),
+)
+
+
+def scope_key(subject: str, topic: str) -> str:
+    # Difficulty is left out on purpose: a reworded question is redundant at any level
+    subject = " ".join(subject.lower().split())
+    topic = " ".join(topic.lower().split())
+    return f"{subject}|{topic}"
+
+
+def _signature_id(scope: str, question: dict) -> str:
+    text = " ".join(similarity.question_text(question).lower().split())
+    choices = "|".join(similarity.choices(question))
+    return hashlib.sha1(f"{scope}|{text}|{choices}".encode()).hexdigest()
+
+
+async def ensure_indexes():
+    await collection.create_index([("scope", ASCENDING)])
+
+
+async def get_index(subject: str, topic: str) -> similarity.LSHIndex:
+    scope = scope_key(subject, topic)
+
+    async def load():
+        index = similarity.LSHIndex()
+        async for doc in collection.find({"scope": scope}, {"signature": 1}):
+            signature = np.frombuffer(doc["signature"], dtype=np.uint32)
+            # Older formats are skipped until rebuild_index replaces them
+            if signature.size == similarity.SIGNATURE_SIZE:
+                index.add(doc["_id"], signature)
+        return index
+
+    return await _indexes.get_or_load(scope, load)
+
+
+class NearDuplicateFilter:
+    """
+    Admits questions for one quiz: a question is rejected when it is a near-duplicate
+    of one already admitted, or (with check_index) of one stored for the topic.
+    """
+
+    def __init__(self, index: similarity.LSHIndex, threshold: float):
+        self.index = index
+        self.threshold = threshold
+        self.admitted = similarity.LSHIndex()
+
+    def admit(self, question: dict, check_index: bool = True) -> bool:
+        signature = similarity.signature(question)
+        if self.admitted.query(signature, self.threshold) is not None:
+            REJECTED.inc(match="quiz")
+            return False
+        if check_index and self.index.query(signature, self.threshold) is not None:
+            REJECTED.inc(match="index")
+            return False
+        self.admitted.add(len(self.admitted), signature)
+        return True
+
+
+async def new_filter(subject: str, topic: str) -> NearDuplicateFilter:
+    return NearDuplicateFilter(await get_index(subject, topic), settings.SIMILARITY_THRESHOLD)
+
+
+def _upsert(scope: str, quiz_id: str, question: dict, indexed_at: datetime) -> tuple:
+    signature = similarity.signature(question)
+    doc_id = _signature_id(scope, question)
+    operation = UpdateOne(
+        {"_id": doc_id},
+        {
+            "$set": {"indexed_at": indexed_at, "signature": Binary(signature.tobytes())},
+            "$setOnInsert": {"scope": scope, "quiz_id": quiz_id},
+        },
+        upsert=True,
+    )
+    return doc_id, signature, operation
+
+
+async def add_questions(subject: str, topic: str, quiz_id: str, questions: List[dict]):
+    """Index the questions of a newly stored quiz."""
+    if not questions:
+        return
+    scope = scope_key(subject, topic)
+    now = datetime.utcnow()
+    entries = [_upsert(scope, quiz_id, q, now) for q in questions]
+    await collection.bulk_write([operation for _, _, operation in entries], ordered=False)
+    index: Optional[similarity.LSHIndex] = _indexes.get(scope)
+    if index is not None:
+        for doc_id, signature, _ in entries:
+            index.add(doc_id, signature)
+
+
+async def rebuild_index(batch_size: int = 1000) -> int:
+    """
+    (Re)index the questions of every quiz in db.quizzes, then drop signatures no quiz
+    has anymore. Safe to rerun; serves stale-but-complete results while it runs.
+    """
+    started = datetime.utcnow()
+    operations = []
+    indexed = 0
+    cursor = db.quizzes.find({}, {"subject": 1, "topic": 1, "questions": 1})
+    async for quiz in cursor:
+        scope = scope_key(quiz.get("subject") or "", quiz.get("topic") or "")
+        for question in quiz.get("questions") or []:
+            operations.append(_upsert(scope, str(quiz["_id"]), question, started)[2])
+            indexed += 1
+        if len(operations) >= batch_size:
+            await collection.bulk_write(operations, ordered=False)
+            operations = []
+    if operations:
+        await collection.bulk_write(operations, ordered=False)
+    await collection.delete_many({"indexed_at": {"$lt": started}})
+    _indexes.clear()
+    return indexed
+
+
+if __name__ == "__main__":
+    async def main():
+        await ensure_indexes()
+        print(f"Indexed {await rebuild_index()} questions")
+
+    asyncio.run(main())
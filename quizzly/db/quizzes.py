@@ -0,0 +1,49 @@
+# app/db/quizzes.py
+from datetime import datetime
+from pymongo import ASCENDING, DESCENDING
+from quizzly.db.mongodb import db
+from quizzly.utils import cursor
+
+collection = db.quizzes
+
+# Fields the dashboard needs to render a quiz card
+SUMMARY_PROJECTION = {
+    "name": 1,
+    "subject": 1,
+    "topic": 1,
+    "difficulty_level": 1,
+    "num_questions": 1,
+    "exec_time": 1,
+    "created_at": 1,
+    "trigger_link": 1,
+    "password": 1,
+    "is_started": 1,
+    "is_executed": 1,
+}
+
+# Owner listing order: newest first
+LISTING_SORT = [("created_at", DESCENDING), ("_id", DESCENDING)]
+
+
+async def ensure_indexes():
+    await collection.create_index([("created_by", ASCENDING)] + LISTING_SORT)
+
+
+def encode_cursor(doc: dict) -> str:
+    return cursor.encode_cursor([doc["created_at"].isoformat(), doc["_id"]])
+
+
+def listing_filter(created_by: str, after: str = None) -> dict:
+    query = {"created_by": created_by}
+    if after is None:
+        return query
+    created_at, quiz_id = cursor.decode_cursor(after, 2)
+    try:
+        created_at = datetime.fromisoformat(created_at)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+    query["$or"] = [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "_id": {"$lt": quiz_id}},
+    ]
+    return query
@@ -0,0 +1,117 @@
+# app/db/submissions.py
+import asyncio
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from quizzly.db.mongodb import db
+from quizzly.utils import cursor
+
+# One document per (quiz, participant), created when the participant starts the quiz
+# and completed when they submit their answers
+collection = db.submissions
+
+
+def new_submission(quiz_id: str, name: str, start_time) -> dict:
+    return {
+        "quiz_id": quiz_id,
+        "name": name,
+        "start_time": start_time,
+        "end_time": None,
+        "exec_time": None,
+        "answers": [],
+        "score": 0,
+        "submitted": False,
+    }
+
+
+# Leaderboard order: highest score first, then fastest, then insertion order
+LEADERBOARD_SORT = [("score", DESCENDING), ("exec_time", ASCENDING), ("_id", ASCENDING)]
+
+
+async def ensure_indexes():
+    await collection.create_index([("quiz_id", ASCENDING), ("name", ASCENDING)], unique=True)
+    await collection.create_index(
+        [("quiz_id", ASCENDING), ("submitted", ASCENDING)] + LEADERBOARD_SORT
+    )
+
+
+def encode_cursor(doc: dict) -> str:
+    return cursor.encode_cursor([doc.get("score", 0), doc.get("exec_time"), str(doc["_id"])])
+
+
+def decode_cursor(value: str) -> tuple:
+    """Raise ValueError for cursors that were not produced by encode_cursor."""
+    score, exec_time, doc_id = cursor.decode_cursor(value, 3)
+    try:
+        return score, exec_time, ObjectId(doc_id)
+    except (TypeError, InvalidId) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def leaderboard_filter(quiz_id: str, after: str = None) -> dict:
+    query = {"quiz_id": quiz_id, "submitted": True}
+    if after is None:
+        return query
+    score, exec_time, doc_id = decode_cursor(after)
+    # Keyset condition for entries strictly after the cursor in LEADERBOARD_SORT order
+    # (null exec_time sorts before any number)
+    if exec_time is None:
+        slower = {"exec_time": {"$ne": None}}
+    else:
+        slower = {"exec_time": {"$gt": exec_time}}
+    query["$or"] = [
+        {"score": {"$lt": score}},
+        {"score": score, **slower},
+        {"score": score, "exec_time": exec_time, "_id": {"$gt": doc_id}},
+    ]
+    return query
+
+
+async def migrate_embedded_responses():
+    """
+    Move `taken_by` and `user_responses` embedded in quiz documents into the
+    submissions collection. Idempotent, only touches quizzes that still embed them.
+    """
+    cursor = db.quizzes.find(
+        {"$or": [{"user_responses.0": {"$exists": True}}, {"taken_by.0": {"$exists": True}}]},
+        {"taken_by": 1, "user_responses": 1, "start_time": 1, "end_time": 1, "exec_time": 1},
+    )
+    migrated = 0
+    async for quiz in cursor:
+        quiz_id = quiz["_id"]
+        ops = []
+        for name in quiz.get("taken_by", []):
+            ops.append(UpdateOne(
+                {"quiz_id": quiz_id, "name": name},
+                {"$setOnInsert": new_submission(quiz_id, name, quiz.get("start_time"))},
+                upsert=True,
+            ))
+        for resp in quiz.get("user_responses", []):
+            name = resp.get("name")
+            ops.append(UpdateOne(
+                {"quiz_id": quiz_id, "name": name},
+                {
+                    "$set": {
+                        "answers": resp.get("answers", []),
+                        "score": resp.get("score", 0),
+                        "submitted": True,
+                        "end_time": quiz.get("end_time"),
+                        "exec_time": quiz.get("exec_time"),
+                    },
+                    "$setOnInsert": {"start_time": quiz.get("start_time")},
+                },
+                upsert=True,
+            ))
+        if ops:
+            await collection.bulk_write(ops, ordered=False)
+        await db.quizzes.update_one({"_id": quiz_id}, {"$set": {"taken_by": [], "user_responses": []}})
+        migrated += 1
+    return migrated
+
+
+if __name__ == "__main__":
+    async def main():
+        await ensure_indexes()
+        print(f"Migrated {await migrate_embedded_responses()} quizzes")
+
+    asyncio.run(main())
@@ -1,28 +1,114 @@
 # app/main.py
+import importlib
+import logging
+from contextlib import asynccontextmanager
+from typing import Iterable
 from fastapi import FastAPI
-from quizzly.routes import parent, quiz, content
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.middleware.cors import CORSMiddleware
-from quizzly.routes import parent, quiz
-from quizzly.core.config import settings
+from quizzly.core.config import get_settings
+from quizzly.core.middleware import MetricsMiddleware, ProfilingMiddleware
+from quizzly.core.responses import ORJSONResponse
+
+logger = logging.getLogger(__name__)
+
+# name -> (module, prefix, tags). Routers, like everything that reads settings at
+# import time, are imported by create_app: a process that leaves a router out never
+# imports its dependencies
+ROUTERS = {
+    "parent": ("quizzly.routes.parent", "/parent", ["Parent"]),
+    "quiz": ("quizzly.routes.quiz", "/quiz", ["Quiz"]),
+    "content": ("quizzly.routes.content", "/content", ["Content"]),
+}
+
+
+def create_app(routers: Iterable[str] = tuple(ROUTERS)) -> FastAPI:
+    """Build the API with only the given ROUTERS (all by default)."""
+    settings = get_settings()
+    from quizzly.db import indexes, mongodb
+
+    modules = {}
+    for name in routers:
+        if name not in ROUTERS:
+            raise ValueError(f"Unknown router {name!r}, expected one of {sorted(ROUTERS)}")
+        modules[name] = importlib.import_module(ROUTERS[name][0])
+    quiz = modules.get("quiz")
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await mongodb.connect()
+        if "parent" in modules:
+            await indexes.ensure_parent_indexes()
+        if quiz is not None:
+            from quizzly.db import submissions
+            from quizzly.utils import gemini
+
+            await indexes.ensure_quiz_indexes()
+            if settings.MIGRATE_ON_STARTUP:
+                # Idempotent; a no-op once no quiz embeds responses any more
+                await submissions.migrate_embedded_responses()
+            await gemini.init_client()
+            await quiz.job_pool.start()
+            await quiz.live_sessions.start()
+        try:
+            yield
+        finally:
+            if quiz is not None:
+                # Durable flush of live quizzes before the client goes away
+                await quiz.live_sessions.stop()
+                await quiz.job_pool.stop()
+                await gemini.close_client()
+            if "parent" in modules:
+                from quizzly.auth import passwords
+
+                passwords.shutdown()
+            mongodb.close()
+
+    app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+    # Read and parse CORS origins
+    origins = [origin.strip() for origin in settings.CORS_ORIGINS.split(",") if origin.strip()]
+
+    logger.info("CORS origins: %s", origins)
+
+    # Enable CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    for name, module in modules.items():
+        _, prefix, tags = ROUTERS[name]
+        app.include_router(module.router, prefix=prefix, tags=tags)
+
+    if settings.PROFILING_ENABLED:
+        from quizzly.routes import admin
+
+        app.add_middleware(
+            ProfilingMiddleware,
+            store=admin.profile_store,
+            sample_rate=settings.PROFILING_SAMPLE_RATE,
+            slow_threshold_ms=settings.PROFILING_SLOW_THRESHOLD_MS,
+            interval_ms=settings.PROFILING_INTERVAL_MS,
+            token=settings.ADMIN_TOKEN,
+        )
+        app.include_router(admin.router, prefix="/admin", tags=["Admin"])
 
+    if settings.METRICS_ENABLED:
+        from quizzly.routes import metrics
 
-app = FastAPI()
-# Read and parse CORS origins
-origins_str = settings.CORS_ORIGINS
-origins = [origin.strip() for origin in origins_str.split(",") if origin.strip()]
+        # Added last so it wraps CORS too and times the whole request
+        app.add_middleware(MetricsMiddleware)
+        app.include_router(metrics.router)
 
-print(origins)
+    return app
 
-# Enable CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
 
-app.include_router(parent.router, prefix="/parent", tags=["Parent"])
-app.include_router(quiz.router, prefix="/quiz", tags=["Quiz"])
-app.include_router(content.router, prefix="/content", tags=["Content"])
+def __getattr__(name):
+    # `uvicorn quizzly.main:app` builds the full app on first access; importing
+    # create_app from here builds nothing
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
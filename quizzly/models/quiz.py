@@ -80,3 +80,47 @@ class Quiz(BaseModel):
     class Config:
         json_encoders = {ObjectId: str, datetime: lambda v: v.isoformat()}
         populate_by_name = True
+
+
+# Output models of hot responses, which are built from already validated data and
+# returned as ORJSONResponse. Routes list them in `responses` for the OpenAPI schema;
+# FastAPI does not validate a Response returned directly, so they are not response_model
+class QuizOut(BaseModel):
+    id: str = Field(alias="_id")
+    name: str
+    subject: str
+    trigger_link: str
+    num_questions: int
+    questions: List[Question]
+    user_responses: List[dict]
+    taken_by: List[str]
+    topic: str
+    difficulty_level: int
+    created_by: str
+    created_at: datetime
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+    exec_time: Optional[float] = None
+    is_started: bool
+    is_executed: bool
+    metadata_fields: dict
+    password: int
+
+
+class SubmitResult(BaseModel):
+    message: str
+    score: int
+    total: int
+
+
+class LeaderboardEntry(BaseModel):
+    id: str
+    name: str
+    score: int
+    percentage: int
+    correctAnswers: int
+    incorrectAnswers: int
+    timeTaken: str
+    timeTakenSeconds: Optional[float] = None
+    attemptedAt: str
+    answers: Optional[List[dict]] = None
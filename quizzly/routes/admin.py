@@ -0,0 +1,45 @@
+# app/routes/admin.py
+import asyncio
+import hmac
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from quizzly.core.config import settings
+from quizzly.core.responses import dumps
+from quizzly.utils import profiler
+
+profile_store = profiler.ProfileStore(settings.PROFILING_DIR, settings.PROFILING_MAX_FILES)
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get("/profiles")
+async def list_profiles():
+    """Stored request profiles, newest first."""
+    return await asyncio.to_thread(profile_store.list)
+
+
+@router.get("/profiles/{profile_id}")
+async def download_profile(profile_id: str, format: str = "speedscope"):
+    """Download a profile for https://www.speedscope.app (`speedscope`) or flame graph tools (`collapsed`)."""
+    if format not in ("speedscope", "collapsed"):
+        raise HTTPException(status_code=400, detail="Unsupported format, use one of ['speedscope', 'collapsed']")
+    profile = await asyncio.to_thread(profile_store.load, profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "collapsed":
+        content, media_type, suffix = profiler.to_collapsed(profile), "text/plain", "txt"
+    else:
+        content, media_type, suffix = dumps(profiler.to_speedscope(profile)), "application/json", "speedscope.json"
+    return Response(
+        content=content,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.{suffix}"'},
+    )
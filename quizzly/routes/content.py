@@ -1,39 +1,145 @@
+import asyncio
+import threading
+import time
 from fastapi import APIRouter, HTTPException
 from typing import List
-import json
-from googleapiclient.discovery import build
-from duckduckgo_search import DDGS
 from quizzly.core.config import settings
-import os
+from quizzly.utils import metrics
+from quizzly.utils.cache import TTLCache
 from pydantic import BaseModel
 
 router = APIRouter()
 
+# Lookups are cached per (provider, topic, num_results) and run in worker threads,
+# at most CONTENT_MAX_CONCURRENCY at a time
+_cache = TTLCache(maxsize=settings.CONTENT_CACHE_MAX_ENTRIES, ttl=settings.CONTENT_CACHE_TTL_SECONDS)
+_semaphore = asyncio.Semaphore(settings.CONTENT_MAX_CONCURRENCY)
+
+PROVIDER_DURATION = metrics.histogram(
+    "content_provider_duration_seconds",
+    "Time spent on uncached content lookups, by provider.",
+    ("provider",),
+)
+PROVIDER_REQUESTS = metrics.counter(
+    "content_provider_requests_total",
+    "Uncached content lookups by provider and outcome (ok, timeout, error).",
+    ("provider", "outcome"),
+)
+
+# The discovery-built service is reused; httplib2 is not thread-safe, so every
+# worker thread gets its own Http object. The provider clients are slow to import,
+# so they are only imported by the first lookup that needs them
+_youtube = None
+_youtube_lock = threading.Lock()
+_thread_local = threading.local()
+
+
 class TopicsRequest(BaseModel):
     topics: List[str]
     num_results: int = 5
 
+
+def _get_youtube():
+    global _youtube
+    with _youtube_lock:
+        if _youtube is None:
+            from googleapiclient.discovery import build
+            client_options = {"api_endpoint": settings.YOUTUBE_API_ENDPOINT} if settings.YOUTUBE_API_ENDPOINT else None
+            _youtube = build(
+                'youtube', 'v3',
+                developerKey=settings.YOUTUBE_API_KEY,
+                cache_discovery=False,
+                client_options=client_options
+            )
+    return _youtube
+
+
+def _thread_http():
+    http = getattr(_thread_local, "http", None)
+    if http is None:
+        import httplib2
+        http = _thread_local.http = httplib2.Http()
+    return http
+
+
+def _search_articles(topic: str, num_results: int) -> list:
+    from duckduckgo_search import DDGS
+    from duckduckgo_search.exceptions import TimeoutException
+
+    try:
+        with DDGS() as ddgs:
+            search_results = ddgs.text(topic, max_results=num_results)
+    except TimeoutException as e:
+        raise TimeoutError(str(e)) from e
+    articles = []
+    for res in search_results or []:
+        title = res.get('title')
+        url = res.get('href')
+        if title and url:
+            articles.append({'title': title, 'url': url})
+    return articles
+
+
+def _search_youtube(topic: str, num_results: int) -> list:
+    search_response = _get_youtube().search().list(
+        q=topic,
+        part='snippet',
+        type='video',
+        maxResults=num_results
+    ).execute(http=_thread_http())
+
+    youtube_data = []
+    for item in search_response['items']:
+        video_title = item['snippet']['title']
+        video_url = f"https://www.youtube.com/watch?v={item['id']['videoId']}"
+        thumbnail_url = item['snippet']['thumbnails']['high']['url']
+        youtube_data.append({
+            'title': video_title,
+            'video_url': video_url,
+            'thumbnail_url': thumbnail_url
+        })
+    return youtube_data
+
+
+async def _lookup(provider: str, search, topic: str, num_results: int) -> list:
+    async def load():
+        async with _semaphore:
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                found = await asyncio.to_thread(search, topic, num_results)
+                outcome = "ok"
+                return found
+            except TimeoutError:
+                outcome = "timeout"
+                raise
+            finally:
+                PROVIDER_DURATION.observe(time.perf_counter() - started, provider=provider)
+                PROVIDER_REQUESTS.inc(provider=provider, outcome=outcome)
+
+    key = (provider, " ".join(topic.lower().split()), num_results)
+    return await _cache.get_or_load(key, load)
+
+
+async def _fan_out(provider: str, search, request: TopicsRequest) -> dict:
+    topics = list(dict.fromkeys(request.topics))
+    found = await asyncio.gather(
+        *(_lookup(provider, search, topic, request.num_results) for topic in topics)
+    )
+    return dict(zip(topics, found))
+
+
 @router.post("/articles")
 async def get_articles(request: TopicsRequest):
     """
     Get articles based on provided topics using DuckDuckGo search
     """
     try:
-        results = {}
-        with DDGS() as ddgs:
-            for topic in request.topics:
-                search_results = ddgs.text(topic, max_results=request.num_results)
-                articles = []
-                for res in search_results:
-                    title = res.get('title')
-                    url = res.get('href')
-                    if title and url:
-                        articles.append({'title': title, 'url': url})
-                results[topic] = articles
-        return results
+        return await _fan_out("articles", _search_articles, request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+
 @router.post("/youtube")
 async def get_youtube_videos(request: TopicsRequest):
     """
@@ -41,33 +147,8 @@ async def get_youtube_videos(request: TopicsRequest):
     """
     if not settings.YOUTUBE_API_KEY:
         raise HTTPException(status_code=500, detail="YouTube API key not configured")
-    
+
     try:
-        youtube = build('youtube', 'v3', developerKey=settings.YOUTUBE_API_KEY)
-        results = {}
-
-        for topic in request.topics:
-            search_response = youtube.search().list(
-                q=topic,
-                part='snippet',
-                type='video',
-                maxResults=request.num_results
-            ).execute()
-
-            youtube_data = []
-            for item in search_response['items']:
-                video_title = item['snippet']['title']
-                video_url = f"https://www.youtube.com/watch?v={item['id']['videoId']}"
-                video_id = item['id']['videoId']
-                thumbnail_url = item['snippet']['thumbnails']['high']['url']
-                youtube_data.append({
-                    'title': video_title,
-                    'video_url': video_url,
-                    'thumbnail_url': thumbnail_url
-                })
-            
-            results[topic] = youtube_data
-
-        return results
+        return await _fan_out("youtube", _search_youtube, request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,11 @@
+# app/routes/metrics.py
+from fastapi import APIRouter, Response
+from quizzly.utils.metrics import REGISTRY
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus text exposition of the request, MongoDB and provider metrics."""
+    return Response(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,10 +1,11 @@
 # app/routes/parent.py
-import bcrypt
 from fastapi import APIRouter, HTTPException
+from quizzly.auth import passwords
 from quizzly.models.parent import Parent, ParentCreate
 from quizzly.db.mongodb import db
-from quizzly.utils.jwt import create_token
+from quizzly.auth.jwt_handler import create_token
 from pydantic import BaseModel
+from pymongo.errors import DuplicateKeyError
 
 
 class LoginRequest(BaseModel):
@@ -18,10 +19,12 @@ router = APIRouter()
 @router.post("/register")
 async def register_parent(data: ParentCreate):
     parent_data = Parent(**data.dict())
-    parent_data.password = bcrypt.hashpw(parent_data.password.encode(), bcrypt.gensalt()).decode()
-    await db.parents.insert_one(parent_data.model_dump(by_alias=True))
-    parent = await db.parents.find_one({"username": parent_data.username})
-    token = create_token({"id": str(parent["_id"])})
+    parent_data.password = await passwords.hash_password(parent_data.password)
+    try:
+        await db.parents.insert_one(parent_data.model_dump(by_alias=True))
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Username already exists")
+    token = create_token({"id": parent_data.id, "username": parent_data.username, "name": parent_data.name})
     return {"message": "Parent registered successfully", "access_token": token}
 
 
@@ -30,7 +33,11 @@ async def login(data: LoginRequest):
     parent = await db.parents.find_one({"username": data.username})
     if not parent:
         raise HTTPException(status_code=404, detail="User not found")
-    if not bcrypt.checkpw(data.password.encode(), parent["password"].encode()):
+    if not await passwords.verify_password(data.password, parent["password"]):
         raise HTTPException(status_code=401, detail="Invalid password")
-    token = create_token({"id": str(parent["_id"])})
+    # Upgrade the stored hash when BCRYPT_ROUNDS changed since it was created
+    if passwords.needs_rehash(parent["password"]):
+        new_hash = await passwords.hash_password(data.password)
+        await db.parents.update_one({"_id": parent["_id"]}, {"$set": {"password": new_hash}})
+    token = create_token({"id": str(parent["_id"]), "username": parent["username"], "name": parent.get("name")})
     return {"access_token": token}
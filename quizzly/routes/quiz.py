@@ -1,50 +1,77 @@
 # app/routes/quiz.py
 import pytz
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from quizzly.models.quiz import (
     Quiz,
     QuizCreate,
     QuizStart,
     AnswerSubmission,
     EndQuizRequest,
-    QuestionUpdate
+    QuestionUpdate,
+    QuizOut,
+    SubmitResult,
+    LeaderboardEntry
 )
+from quizzly.core.responses import ORJSONResponse, dumps
 from quizzly.db.mongodb import db
-from quizzly.utils.jwt import get_current_user
-from quizzly.utils.gemini import generate_questions
+from quizzly.db import analytics, question_index, quizzes, submissions
+from quizzly.auth.jwt_handler import get_current_user, get_optional_user
+from quizzly.utils.gemini import stream_questions
+from quizzly.utils import export, generation, grading, jobs, live, pubsub, question_bank
+from quizzly.utils.cache import TTLCache
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+from typing import List, Optional
+import asyncio
+import hashlib
+import httpx
 import random
 from quizzly.core.config import settings
 
 IST = pytz.timezone("Asia/Kolkata")
 router = APIRouter()
 
+# Answer keys per quiz, used for grading; invalidated whenever questions change
+_answer_keys = TTLCache(
+    maxsize=settings.ANSWER_KEY_CACHE_MAX_ENTRIES,
+    ttl=settings.ANSWER_KEY_CACHE_TTL_SECONDS,
+)
 
-@router.post("/quizzes/create", response_model=Quiz)
-async def create_quiz(data: QuizCreate, current_user: dict = Depends(get_current_user)):
-    frontend_url = settings.FRONTEND_URL
-    quiz_id = str(ObjectId())
-    password = random.randint(1000, 9999)
-    num_questions = data.num_questions
-    subject = data.subject
-    topic = data.topic
-    difficulty_level = data.difficulty_level
-    questions = generate_questions(subject, topic, num_questions, difficulty_level)
-    if not questions:
-        raise HTTPException(status_code=500, detail="Failed to generate questions")
-    quiz_doc = {
+# Serialized quiz documents (owner and player views) with their ETags, invalidated by
+# edits and by start/submit/end state changes
+_quiz_cache = TTLCache(
+    maxsize=settings.QUIZ_CACHE_MAX_ENTRIES,
+    ttl=settings.QUIZ_CACHE_TTL_SECONDS,
+)
+
+# Fields students must not see
+PLAYER_HIDDEN_FIELDS = {"password", "user_responses", "taken_by"}
+PLAYER_HIDDEN_QUESTION_FIELDS = {"answer", "is_correct"}
+
+
+def _invalidate_quiz(quiz_id: str):
+    _answer_keys.pop(quiz_id)
+    _quiz_cache.pop(quiz_id)
+    analytics.invalidate_quiz(quiz_id)
+
+
+def _build_quiz_doc(data: QuizCreate, questions: list, created_by: str, quiz_id: Optional[str] = None) -> dict:
+    quiz_id = quiz_id or str(ObjectId())
+    return {
         "_id": quiz_id,
         "name": data.name,
         "subject": data.subject,
-        "trigger_link": f"{frontend_url}/take-quiz/{quiz_id}",
-        "num_questions": num_questions,
+        "trigger_link": f"{settings.FRONTEND_URL}/take-quiz/{quiz_id}",
+        "num_questions": len(questions),
         "questions": questions,
+        # Kept empty for compatibility, participants live in db.submissions
         "user_responses": [],
         "taken_by": [],
         "topic": data.topic,
         "difficulty_level": data.difficulty_level,
-        "created_by": current_user["id"],
+        "created_by": created_by,
         "created_at": datetime.now(IST).replace(tzinfo=None),
         "start_time": None,
         "end_time": None,
@@ -52,128 +79,445 @@ async def create_quiz(data: QuizCreate, current_user: dict = Depends(get_current
         "is_started": False,
         "is_executed": False,
         "metadata_fields": {},
-        "password": password
+        "password": random.randint(1000, 9999)
     }
+
+
+async def _store_quiz(data: QuizCreate, questions: list, created_by: str, quiz_id: Optional[str] = None) -> dict:
+    quiz_doc = _build_quiz_doc(data, questions, created_by, quiz_id)
     await db.quizzes.insert_one(quiz_doc)
+    analytics.invalidate_owner(created_by)
+    await question_index.add_questions(data.subject, data.topic, quiz_doc["_id"], questions)
     return quiz_doc
 
 
+async def _collect_questions(data: QuizCreate) -> list:
+    num_questions = data.num_questions
+    subject = data.subject
+    topic = data.topic
+    difficulty_level = data.difficulty_level
+    # Serve part of the quiz from the question bank (see sample_questions), generate the rest.
+    # Generated questions that reword one already stored for the topic, or one already
+    # in this quiz, are dropped and replaced
+    near_duplicates = await question_index.new_filter(subject, topic)
+    bank_key = question_bank.make_key(subject, topic, difficulty_level)
+    sampled = await question_bank.sample_questions(bank_key, num_questions)
+    questions = [q for q in sampled if near_duplicates.admit(q, check_index=False)]
+    remaining = num_questions - len(questions)
+    if remaining > 0:
+        try:
+            generated = await generation.generate_quiz_questions(
+                subject, topic, remaining, difficulty_level, accept=near_duplicates.admit
+            )
+        except httpx.TimeoutException:
+            raise HTTPException(status_code=504, detail="Question generation timed out")
+        except generation.RETRYABLE_ERRORS:
+            raise HTTPException(status_code=502, detail="Question generation failed")
+        await question_bank.store_questions(bank_key, generated)
+        questions.extend(generated[:remaining])
+    if not questions:
+        raise HTTPException(status_code=500, detail="Failed to generate questions")
+    return questions
+
+
+async def _run_generation_job(job: dict) -> dict:
+    data = QuizCreate(**job["payload"])
+    try:
+        questions = await _collect_questions(data)
+    except HTTPException as e:
+        raise RuntimeError(e.detail)
+    # The quiz takes the job's id, so a job run twice (its lease lost mid-generation)
+    # still creates one quiz: the second insert fails and the first quiz stands
+    try:
+        await _store_quiz(data, questions, job["owner"], quiz_id=job["_id"])
+    except DuplicateKeyError:
+        pass
+    return {"quiz_id": job["_id"]}
+
+
+if settings.QUIZ_JOB_BACKEND == "memory":
+    _job_queue = jobs.InMemoryJobQueue(settings.QUIZ_JOB_LEASE_SECONDS)
+else:
+    _job_queue = jobs.MongoJobQueue(db.quiz_jobs, settings.QUIZ_JOB_LEASE_SECONDS)
+
+# Active quizzes are played against in-memory sessions; reads of submissions or quiz
+# state flush the quiz's pending writes first
+live_sessions = live.LiveSessionManager(
+    flush_interval=settings.LIVE_FLUSH_INTERVAL_SECONDS,
+    batch_size=settings.LIVE_FLUSH_BATCH_SIZE,
+    idle_timeout=settings.LIVE_SESSION_IDLE_SECONDS,
+)
+
+job_pool = jobs.JobWorkerPool(
+    _job_queue,
+    _run_generation_job,
+    concurrency=settings.QUIZ_JOB_WORKERS,
+    poll_interval=settings.QUIZ_JOB_POLL_INTERVAL,
+)
+
+
+@router.post("/quizzes/create", responses={
+    200: {"model": QuizOut},
+    202: {"description": "Queued as a background job, see GET /quiz/jobs/{job_id}"},
+})
+async def create_quiz(
+    data: QuizCreate,
+    background: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
+    if background:
+        job = jobs.new_job("create_quiz", current_user["id"], data.model_dump())
+        if not await job_pool.submit(job, max_active=settings.QUIZ_JOB_MAX_PER_USER):
+            raise HTTPException(status_code=429, detail="Too many quiz generation jobs in progress")
+        return ORJSONResponse(
+            status_code=202,
+            content={"job_id": job["_id"], "status": job["status"]},
+            headers={"Location": f"/quiz/jobs/{job['_id']}"},
+        )
+
+    questions = await _collect_questions(data)
+    quiz_doc = await _store_quiz(data, questions, current_user["id"])
+    # Questions were validated when collected, skip re-validating them through QuizOut
+    return ORJSONResponse(quiz_doc)
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    job = await _job_queue.get(job_id)
+    if not job or job["owner"] != current_user["id"]:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {
+        "job_id": job["_id"],
+        "status": job["status"],
+        "result": job["result"],
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "finished_at": job["finished_at"],
+    }
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {dumps(data).decode()}\n\n"
+
+
+@router.post("/quizzes/create/stream")
+async def create_quiz_stream(data: QuizCreate, current_user: dict = Depends(get_current_user)):
+    """
+    Same as create_quiz, but sends every question as a Server-Sent Event as soon as it
+    is available and the persisted quiz as the final `quiz` event.
+    """
+    subject = data.subject
+    topic = data.topic
+    difficulty_level = data.difficulty_level
+    bank_key = question_bank.make_key(subject, topic, difficulty_level)
+
+    async def events():
+        # Near-duplicates are dropped as in _collect_questions
+        near_duplicates = await question_index.new_filter(subject, topic)
+        sampled = await question_bank.sample_questions(bank_key, data.num_questions)
+        questions = [q for q in sampled if near_duplicates.admit(q, check_index=False)]
+        for question in questions:
+            yield _sse("question", question)
+
+        generated = []
+        dropped = 0
+        remaining = data.num_questions - len(questions)
+        if remaining > 0:
+            try:
+                async for raw in stream_questions(subject, topic, remaining, difficulty_level):
+                    valid = question_bank.validate_questions([raw])
+                    if not valid or len(generated) >= remaining:
+                        continue
+                    if not near_duplicates.admit(valid[0]):
+                        dropped += 1
+                        continue
+                    generated.extend(valid)
+                    yield _sse("question", valid[0])
+            except httpx.HTTPError:
+                # Keep whatever was parsed before the upstream failure
+                pass
+            missing = min(dropped, remaining - len(generated))
+            if missing > 0:
+                # Replace the dropped near-duplicates with a regular generation
+                try:
+                    extra = await generation.generate_quiz_questions(
+                        subject, topic, missing, difficulty_level, accept=near_duplicates.admit
+                    )
+                except (httpx.TimeoutException, *generation.RETRYABLE_ERRORS):
+                    extra = []
+                for question in extra[:missing]:
+                    generated.append(question)
+                    yield _sse("question", question)
+            await question_bank.store_questions(bank_key, generated)
+            questions.extend(generated)
+
+        if not questions:
+            yield _sse("error", {"detail": "Failed to generate questions"})
+            return
+        quiz_doc = await _store_quiz(data, questions, current_user["id"])
+        yield _sse("quiz", quiz_doc)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/question-bank/stats")
+async def get_question_bank_stats():
+    return question_bank.stats
+
+
 @router.get("/quizzes")
-async def get_quizzes():
-    quizzes = await db.quizzes.find().to_list(100)
-    for quiz in quizzes:
+async def get_quizzes(
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    after: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Summaries of the current user's quizzes, newest first. Pass the `X-Next-Cursor`
+    header of the previous page as `after` to get the next one.
+    """
+    try:
+        query = quizzes.listing_filter(current_user["id"], after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    await live_sessions.flush_owner(current_user["id"])
+
+    quiz_list = await db.quizzes.find(query, quizzes.SUMMARY_PROJECTION) \
+        .sort(quizzes.LISTING_SORT) \
+        .limit(limit) \
+        .to_list(limit)
+
+    # Participant counts for the whole page in one aggregation
+    counts = {}
+    if quiz_list:
+        cursor = submissions.collection.aggregate([
+            {"$match": {"quiz_id": {"$in": [quiz["_id"] for quiz in quiz_list]}}},
+            {"$group": {
+                "_id": "$quiz_id",
+                "participants": {"$sum": 1},
+                "submissions": {"$sum": {"$cond": ["$submitted", 1, 0]}}
+            }}
+        ])
+        counts = {row["_id"]: row async for row in cursor}
+
+    for quiz in quiz_list:
         quiz["_id"] = str(quiz["_id"])
-    return quizzes
+        row = counts.get(quiz["_id"], {})
+        quiz["participants"] = row.get("participants", 0)
+        quiz["submissions"] = row.get("submissions", 0)
+
+    if len(quiz_list) == limit:
+        response.headers["X-Next-Cursor"] = quizzes.encode_cursor(quiz_list[-1])
+    return quiz_list
+
+
+def _player_view(quiz: dict) -> dict:
+    view = {k: v for k, v in quiz.items() if k not in PLAYER_HIDDEN_FIELDS}
+    view["questions"] = [
+        {k: v for k, v in q.items() if k not in PLAYER_HIDDEN_QUESTION_FIELDS}
+        for q in quiz.get("questions", [])
+    ]
+    return view
+
+
+def _serialize(doc: dict) -> tuple:
+    body = dumps(doc)
+    return f'"{hashlib.sha1(body).hexdigest()}"', body
+
+
+async def _get_cached_quiz(quiz_id: str) -> dict:
+    async def load():
+        await live_sessions.flush(quiz_id)
+        quiz = await db.quizzes.find_one({"_id": quiz_id})
+        if not quiz:
+            raise HTTPException(status_code=404, detail="Quiz not found")
+        return {
+            "created_by": quiz.get("created_by"),
+            "full": _serialize(quiz),
+            "player": _serialize(_player_view(quiz)),
+        }
+
+    return await _quiz_cache.get_or_load(quiz_id, load)
 
 
 @router.get("/quizzes/{quiz_id}")
-async def get_quiz(quiz_id: str):
-    quiz = await db.quizzes.find_one({"_id": quiz_id})
-    if not quiz:
-        raise HTTPException(status_code=404, detail="Quiz not found")
-    return quiz
+async def get_quiz(
+    quiz_id: str,
+    view: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    current_user: Optional[dict] = Depends(get_optional_user)
+):
+    """
+    The quiz owner gets the full document; everybody else (or `?view=player`) gets the
+    player view without answers, password and responses. Supports If-None-Match.
+    """
+    entry = await _get_cached_quiz(quiz_id)
+    is_owner = current_user is not None and current_user["id"] == entry["created_by"]
+    etag, body = entry["full" if is_owner and view != "player" else "player"]
+
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Authorization"}
+    if if_none_match is not None:
+        tags = {tag.strip() for tag in if_none_match.split(",")}
+        if etag in tags or "*" in tags:
+            return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @router.put("/quizzes/{quiz_id}")
 async def update_quiz(quiz_id: str, quiz: Quiz):
-    await db.quizzes.update_one({"_id": quiz_id}, {"$set": quiz.dict(by_alias=True)})
+    # Participants and responses live in the submissions collection
+    quiz_data = quiz.dict(by_alias=True, exclude={"taken_by", "user_responses"})
+    # Starts and submits wait until the new answer key is stored and applied
+    async with live_sessions.editing(quiz_id):
+        await db.quizzes.update_one({"_id": quiz_id}, {"$set": quiz_data})
+        _invalidate_quiz(quiz_id)
+        await _regrade(quiz_id, quiz_data["questions"])
+    await pubsub.publish_quiz_event(quiz_id, "quiz_updated")
     return await db.quizzes.find_one({"_id": quiz_id})
 
 
 @router.delete("/quizzes/{quiz_id}")
 async def delete_quiz(quiz_id: str):
-    await db.quizzes.delete_one({"_id": quiz_id})
+    async with live_sessions.editing(quiz_id, discard=True):
+        await db.quizzes.delete_one({"_id": quiz_id})
+        await submissions.collection.delete_many({"quiz_id": quiz_id})
+        _invalidate_quiz(quiz_id)
+    await pubsub.publish_quiz_event(quiz_id, "quiz_deleted")
     return {"msg": "Quiz deleted"}
 
 
 @router.put("/quizzes/{quiz_id}/questions/{index}")
 async def update_question(quiz_id: str, index: int, question: QuestionUpdate, current_user: dict = Depends(get_current_user)):
-    # Find the quiz
-    quiz = await db.quizzes.find_one({"_id": quiz_id})
-    
-    # Check if quiz exists
+    # Starts and submits wait until the new answer key is stored and applied
+    async with live_sessions.editing(quiz_id):
+        # Find the quiz
+        quiz = await db.quizzes.find_one({"_id": quiz_id})
+
+        # Check if quiz exists
+        if not quiz:
+            raise HTTPException(status_code=404, detail="Quiz not found")
+
+        # Check if index is valid
+        if index < 0 or index >= len(quiz["questions"]):
+            raise HTTPException(status_code=404, detail="Question index out of range")
+
+        # Check if user is the creator of the quiz
+        if quiz["created_by"] != current_user["id"]:
+            raise HTTPException(status_code=403, detail="You don't have permission to update this quiz")
+
+        # Update question
+        old_answer = quiz["questions"][index].get("answer")
+        question_data = question.dict(exclude_unset=True)
+        quiz["questions"][index].update(question_data)
+
+        # Save updated quiz
+        await db.quizzes.update_one(
+            {"_id": quiz_id},
+            {"$set": {"questions": quiz["questions"]}}
+        )
+        _invalidate_quiz(quiz_id)
+
+        # Stored grades are stale once the correct answer changes
+        if quiz["questions"][index].get("answer") != old_answer:
+            await _regrade(quiz_id, quiz["questions"])
+    await pubsub.publish_quiz_event(quiz_id, "question_updated", index=index)
+
+    return {"message": "Question updated successfully", "quiz": quiz}
+
+
+async def _regrade(quiz_id: str, questions: list) -> dict:
+    result = await grading.regrade_quiz(quiz_id, [q.get("answer") for q in questions])
+    analytics.invalidate_quiz(quiz_id)
+    if result["updated"]:
+        await pubsub.publish_quiz_event(quiz_id, "regraded", **result)
+    return result
+
+
+@router.post("/quizzes/{quiz_id}/regrade")
+async def regrade_quiz(quiz_id: str, current_user: dict = Depends(get_current_user)):
+    """Recompute is_correct flags and scores of all submissions from the current answer key."""
+    quiz = await db.quizzes.find_one({"_id": quiz_id}, {"created_by": 1, "questions.answer": 1})
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found")
-    
-    # Check if index is valid
-    if index < 0 or index >= len(quiz["questions"]):
-        raise HTTPException(status_code=404, detail="Question index out of range")
-    
-    # Check if user is the creator of the quiz
     if quiz["created_by"] != current_user["id"]:
         raise HTTPException(status_code=403, detail="You don't have permission to update this quiz")
-    
-    # Update question
-    question_data = question.dict(exclude_unset=True)
-    quiz["questions"][index].update(question_data)
-    
-    # Save updated quiz
-    await db.quizzes.update_one(
-        {"_id": quiz_id},
-        {"$set": {"questions": quiz["questions"]}}
-    )
-    
-    return {"message": "Question updated successfully", "quiz": quiz}
+    async with live_sessions.editing(quiz_id):
+        return await _regrade(quiz_id, quiz.get("questions", []))
 
 
 @router.post("/quizzes/start/{quiz_id}")
 async def start_quiz(quiz_id: str, request: QuizStart):
-    quiz = await db.quizzes.find_one({"_id": quiz_id})
-    if not quiz:
+    session = await live_sessions.get(quiz_id, participant=request.name)
+    if session is None:
         raise HTTPException(status_code=404, detail="Quiz not found")
 
-    if quiz.get("password") != request.password:
+    if session.password != request.password:
         raise HTTPException(status_code=401, detail="Invalid password")
 
-    if quiz.get("is_started", False):
-        return {"message": "Quiz already started", "quiz": quiz}
-
-    start_time = datetime.now(pytz.timezone("Asia/Kolkata")).replace(tzinfo=None)
-    await db.quizzes.update_one(
-        {"_id": quiz_id},
-        {
-            "$set": {
-                "is_started": True,
-                "start_time": start_time,
-                "is_executed": False
-                },
-            "$addToSet": {"taken_by": request.name}
-        }
-    )
+    # Register the participant with their own start time
+    start_time = datetime.now(IST).replace(tzinfo=None)
+    if request.name not in session.participants:
+        session.participants[request.name] = submissions.new_submission(quiz_id, request.name, start_time)
+        session.mark_dirty(request.name)
+        live_sessions.changed(session)
 
-    quiz["start_time"] = start_time
-    quiz["is_started"] = True
-    return {"message": "Quiz started", "quiz": quiz}
+    # Decided against the stored state: another worker may have started it already
+    state = await session.refresh_state()
+    if state.get("is_started") or not await session.transition(
+        {"is_started": {"$ne": True}}, is_started=True, start_time=start_time, is_executed=False
+    ):
+        await pubsub.publish_quiz_event(quiz_id, "participant_started", name=request.name)
+        return {"message": "Quiz already started", "quiz": _player_view(session.current_quiz())}
+    quiz = session.current_quiz()
 
+    _quiz_cache.pop(quiz_id)
+    await pubsub.publish_quiz_event(quiz_id, "participant_started", name=request.name)
+    await pubsub.publish_quiz_event(quiz_id, "quiz_started", start_time=start_time.isoformat())
 
-@router.post("/quizzes/{quiz_id}/submit_answers")
+    return {"message": "Quiz started", "quiz": _player_view(quiz)}
+
+
+async def _get_answer_key(quiz_id: str) -> List[str]:
+    async def load():
+        quiz = await db.quizzes.find_one({"_id": quiz_id}, {"questions.answer": 1})
+        if not quiz:
+            raise HTTPException(status_code=404, detail="Quiz not found")
+        return [q["answer"] for q in quiz.get("questions", [])]
+
+    return await _answer_keys.get_or_load(quiz_id, load)
+
+
+@router.post("/quizzes/{quiz_id}/submit_answers", responses={200: {"model": SubmitResult}})
 async def submit_answers(
     quiz_id: str,
     submission: AnswerSubmission
 ):
-    quiz = await db.quizzes.find_one({"_id": quiz_id})
-    if not quiz:
+    # Graded against the live session; the reply waits for the batch that stores it
+    session = await live_sessions.get(quiz_id, participant=submission.name)
+    if session is None:
         raise HTTPException(status_code=404, detail="Quiz not found")
-
-    if not quiz.get("is_started", False):
-        raise HTTPException(status_code=400, detail="Quiz not started yet")
-
-    if submission.name not in quiz.get("taken_by", []):
-        raise HTTPException(status_code=403, detail="User not registered for this quiz")
-
-    questions = quiz["questions"]
-    if len(submission.answers) != len(questions):
+    answer_key = session.answer_key
+    if len(submission.answers) != len(answer_key):
         raise HTTPException(status_code=400, detail="Number of answers does not match questions")
 
-    # Check if user has already submitted
-    if any(resp["name"] == submission.name for resp in quiz.get("user_responses", [])):
+    # The participant must have started the quiz and must not have submitted yet
+    participant = session.participants.get(submission.name)
+    if participant is None:
+        raise HTTPException(status_code=403, detail="User not registered for this quiz")
+    if participant.get("submitted", False):
         raise HTTPException(status_code=400, detail="Answers already submitted")
+    if participant.get("start_time") is None:
+        raise HTTPException(status_code=400, detail="Quiz not started yet")
 
     # Evaluate answers
     evaluated_answers = []
     score = 0
     for i, user_ans in enumerate(submission.answers):
-        correct = questions[i]["answer"] == user_ans
+        correct = answer_key[i] == user_ans
         evaluated_answers.append({
             "question_index": i,
             "answer": user_ans,
@@ -182,66 +526,66 @@ async def submit_answers(
         if correct:
             score += 1
 
-    # Calculate time taken
     end_time = datetime.now(IST).replace(tzinfo=None)
-    start_time = quiz.get("start_time")
-    exec_time = (end_time - start_time).total_seconds() if start_time else 0
-    exec_time = round(exec_time, 2)
-
-    user_response = {
-        "name": submission.name,
-        "answers": evaluated_answers,
-        "score": score
-    }
+    exec_time = round((end_time - participant["start_time"]).total_seconds(), 2)
+    participant.update(
+        answers=evaluated_answers,
+        score=score,
+        submitted=True,
+        end_time=end_time,
+        exec_time=exec_time
+    )
+    session.mark_dirty(submission.name)
+    session.set_state(is_executed=True, is_started=False, end_time=end_time, exec_time=exec_time)
+    live_sessions.changed(session)
+    if not await live_sessions.commit(session, submission.name):
+        raise HTTPException(status_code=400, detail="Answers already submitted")
 
-    await db.quizzes.update_one(
-        {"_id": quiz_id},
-        {
-            "$push": {"user_responses": user_response},
-            "$set": {
-                "is_executed": True,
-                "is_started": False,
-                "end_time": end_time,
-                "exec_time": exec_time
-            }
-        }
+    _quiz_cache.pop(quiz_id)
+    analytics.invalidate_quiz(quiz_id)
+    await pubsub.publish_quiz_event(
+        quiz_id,
+        "submission",
+        name=submission.name,
+        score=score,
+        total=len(answer_key),
+        exec_time=exec_time
     )
 
-    return {
+    return ORJSONResponse({
         "message": "Answers submitted",
         "score": score,
-        "total": len(questions)
-    }
+        "total": len(answer_key)
+    })
 
 
 @router.post("/quizzes/{quiz_id}/end")
 async def end_quiz(quiz_id: str, request: EndQuizRequest):
-    quiz = await db.quizzes.find_one({"_id": quiz_id})
-    if not quiz:
+    session = await live_sessions.get(quiz_id, participant=request.name)
+    if session is None:
         raise HTTPException(status_code=404, detail="Quiz not found")
 
-    if not quiz.get("is_started", False):
+    state = await session.refresh_state()
+    if not state.get("is_started", False):
         raise HTTPException(status_code=400, detail="Quiz has not started yet")
 
-    if quiz.get("is_executed", False):
+    if state.get("is_executed", False):
         raise HTTPException(status_code=400, detail="Quiz already ended")
 
-    user_responses = quiz.get("user_responses", [])
-    user_scores = [{"name": user.get("name"), "score": user.get("score", 0)} for user in user_responses ]
+    user_scores = [
+        {"name": p["name"], "score": p.get("score", 0)}
+        for p in session.participants.values() if p.get("submitted")
+    ]
 
-    user_response_entry = next(
-        (resp for resp in user_responses if resp["name"] == request.name),
-        None
-    )
-
-    if not user_response_entry:
+    participant = session.participants.get(request.name)
+    if not participant or not participant.get("submitted"):
         raise HTTPException(status_code=400, detail="No responses found for this user")
 
-    questions = quiz.get("questions", [])
+    questions = session.questions
     wrong_questions = []
     right_questions = []
 
-    for ans in user_response_entry["answers"]:
+    for ans in participant["answers"]:
         q_idx = ans["question_index"]
         question = questions[q_idx].get("question")
         correct_answer = questions[q_idx].get("answer")
@@ -258,23 +602,24 @@ async def end_quiz(quiz_id: str, request: EndQuizRequest):
 
     score = len(right_questions)
     num_wrong = len(wrong_questions)
-    end_time = datetime.now(pytz.timezone("Asia/Kolkata")).replace(tzinfo=None)
-    start_time = quiz.get("start_time")
+    end_time = datetime.now(IST).replace(tzinfo=None)
+    start_time = state.get("start_time")
     exec_time = (end_time - start_time).total_seconds() if start_time else 0
     exec_time = round(exec_time, 2)
 
-    await db.quizzes.update_one(
-        {"_id": quiz_id, "user_responses.name": request.name},
-        {
-            "$set": {
-                "is_executed": True,
-                "is_started": False,
-                "end_time": end_time,
-                "exec_time": exec_time,
-                "user_responses.$.score": score
-            }
-        }
-    )
+    # The participant's score was stored with their submission. Only one end wins,
+    # whichever worker it reaches
+    if not await session.transition(
+        {"is_started": True, "is_executed": {"$ne": True}},
+        is_executed=True, is_started=False, end_time=end_time, exec_time=exec_time
+    ):
+        raise HTTPException(status_code=400, detail="Quiz already ended")
+    # Ending is a checkpoint: make everything recorded so far durable before replying
+    await live_sessions.flush(quiz_id)
+
+    _quiz_cache.pop(quiz_id)
+    analytics.invalidate_quiz(quiz_id)
+    await pubsub.publish_quiz_event(quiz_id, "quiz_ended", name=request.name, score=score)
 
     return {
         "message": "Quiz ended",
@@ -287,60 +632,186 @@ async def end_quiz(quiz_id: str, request: EndQuizRequest):
     }
 
 
-@router.get("/quizzes/{quiz_id}/leaderboard")
-async def get_leaderboard(quiz_id: str):
-    quiz = await db.quizzes.find_one({"_id": quiz_id})
-    if not quiz:
-        raise HTTPException(status_code=404, detail="Quiz not found")
+def _format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "N/A"
+    return f"{int(seconds // 60)}m {int(seconds % 60)}s"
 
-    user_responses = quiz.get("user_responses", [])
-    total_questions = len(quiz.get("questions", []))
+
+@router.get("/quizzes/{quiz_id}/leaderboard", responses={200: {"model": List[LeaderboardEntry]}})
+async def get_leaderboard(
+    quiz_id: str,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    after: Optional[str] = None,
+    lean: bool = False
+):
+    """
+    Leaderboard ordered by score, then time taken. Pass `limit` and the `X-Next-Cursor`
+    header of the previous page as `after` to page through it; `lean` leaves out the
+    per-answer details.
+    """
+    total_questions = len(await _get_answer_key(quiz_id))
+    await live_sessions.flush(quiz_id)
+
+    try:
+        query = submissions.leaderboard_filter(quiz_id, after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    projection = {"name": 1, "score": 1, "exec_time": 1, "end_time": 1}
+    if not lean:
+        projection["answers"] = 1
+    cursor = submissions.collection.find(query, projection).sort(submissions.LEADERBOARD_SORT)
+    if limit is not None:
+        cursor = cursor.limit(limit)
 
     leaderboard_data = []
-    for response in user_responses:
-        score = response.get("score", 0)
+    last = None
+    async for entry in cursor:
+        last = entry
+        score = entry.get("score", 0)
         percentage = round((score / total_questions) * 100) if total_questions > 0 else 0
-        answers = response.get("answers", [])
-        
-        # Calculate correct and incorrect answers
-        correct_answers = sum(1 for ans in answers if ans.get("is_correct", False))
-        incorrect_answers = len(answers) - correct_answers
-        
-        # Calculate time taken
-        time_taken = "N/A"
-        exec_time = quiz.get("exec_time")
-        if exec_time is not None:
-            minutes = int(exec_time // 60)
-            seconds = int(exec_time % 60)
-            time_taken = f"{minutes}m {seconds}s"
-        else:
-            end_time = quiz.get("end_time")
-            start_time = quiz.get("start_time")
-            if end_time is not None and start_time is not None:
-                time_diff = (end_time - start_time).total_seconds()
-                minutes = int(time_diff // 60)
-                seconds = int(time_diff % 60)
-                time_taken = f"{minutes}m {seconds}s"
+        exec_time = entry.get("exec_time")
 
         # Handle end_time properly
-        end_time = quiz.get("end_time")
+        end_time = entry.get("end_time")
         if end_time is None:
             end_time = datetime.now(IST).replace(tzinfo=None)
         else:
             end_time = end_time.replace(tzinfo=None)
 
-        leaderboard_data.append({
-            "id": str(ObjectId()),  # Generate a unique ID for each entry
-            "name": response.get("name", "Anonymous"),
+        row = {
+            "id": str(entry["_id"]),
+            "name": entry.get("name", "Anonymous"),
             "score": score,
             "percentage": percentage,
-            "correctAnswers": correct_answers,
-            "incorrectAnswers": incorrect_answers,
-            "timeTaken": time_taken,
-            "attemptedAt": end_time.isoformat(),
-            "answers": answers  # Include detailed answer information
-        })
+            "correctAnswers": score,
+            "incorrectAnswers": total_questions - score,
+            "timeTaken": _format_duration(exec_time),
+            "timeTakenSeconds": exec_time,
+            "attemptedAt": end_time.isoformat()
+        }
+        if not lean:
+            row["answers"] = entry.get("answers", [])  # Include detailed answer information
+        leaderboard_data.append(row)
+
+    headers = {}
+    if limit is not None and last is not None and len(leaderboard_data) == limit:
+        headers["X-Next-Cursor"] = submissions.encode_cursor(last)
+    return ORJSONResponse(leaderboard_data, headers=headers)
+
+
+@router.get("/analytics")
+async def get_owner_analytics(current_user: dict = Depends(get_current_user)):
+    """Submission counts, average score and completion time for each of the user's quizzes."""
+    await live_sessions.flush_owner(current_user["id"])
+    return await analytics.owner_analytics(current_user["id"])
+
+
+@router.get("/quizzes/{quiz_id}/analytics")
+async def get_quiz_analytics(quiz_id: str, current_user: dict = Depends(get_current_user)):
+    """Per-question correctness rates, score distribution and averages for one quiz."""
+    quiz = await db.quizzes.find_one({"_id": quiz_id}, {"created_by": 1, "questions.answer": 1})
+    if not quiz:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    if quiz["created_by"] != current_user["id"]:
+        raise HTTPException(status_code=403, detail="You don't have permission to view this quiz")
+    await live_sessions.flush(quiz_id)
+    return await analytics.quiz_analytics(quiz)
+
+
+async def _export_response(quiz_filter: dict, filename: str, fmt: str, gzip: bool) -> StreamingResponse:
+    if fmt not in export.FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format, use one of {list(export.FORMATS)}")
+    filename = f"{filename}.{fmt}"
+    media_type = export.FORMATS[fmt]
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        await export.export_stream(quiz_filter, fmt, gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/quizzes/{quiz_id}/export")
+async def export_quiz_results(
+    quiz_id: str,
+    format: str = "csv",
+    gzip: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
+    """Stream one row per submission (score, timing and one column per question's answer)."""
+    quiz = await db.quizzes.find_one({"_id": quiz_id}, {"created_by": 1})
+    if not quiz:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    if quiz["created_by"] != current_user["id"]:
+        raise HTTPException(status_code=403, detail="You don't have permission to view this quiz")
+    await live_sessions.flush(quiz_id)
+    return await _export_response({"_id": quiz_id}, f"quiz-{quiz_id}-results", format, gzip)
+
+
+@router.get("/export")
+async def export_all_results(
+    format: str = "csv",
+    gzip: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
+    """Same as /quizzes/{quiz_id}/export for every quiz created by the current user."""
+    await live_sessions.flush_owner(current_user["id"])
+    return await _export_response({"created_by": current_user["id"]}, "quiz-results", format, gzip)
+
+
+@router.get("/quizzes/{quiz_id}/events")
+async def quiz_events(quiz_id: str):
+    """
+    Server-Sent Events stream of live quiz activity: participants starting, submissions
+    with their scores, the quiz starting/ending and questions being edited.
+    """
+    subscription = pubsub.subscribe_quiz(quiz_id)
+
+    async def events():
+        with subscription:
+            while True:
+                message = await subscription.get(timeout=settings.EVENTS_HEARTBEAT_SECONDS)
+                if message is None:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ": keep-alive\n\n"
+                else:
+                    yield _sse(message["type"], message)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 
-    # Sort by score (highest first), then by time taken (fastest first)
-    leaderboard_data.sort(key=lambda x: (-x["score"], x["timeTaken"]))
-    return leaderboard_data
+@router.websocket("/quizzes/{quiz_id}/ws")
+async def quiz_events_ws(websocket: WebSocket, quiz_id: str):
+    """WebSocket variant of /quizzes/{quiz_id}/events, one JSON message per event."""
+    await websocket.accept()
+    with pubsub.subscribe_quiz(quiz_id) as subscription:
+        async def forward():
+            while True:
+                message = await subscription.get(timeout=settings.EVENTS_HEARTBEAT_SECONDS)
+                if message is not None:
+                    await websocket.send_text(dumps(message).decode())
+
+        async def watch():
+            # Client frames (pings, app messages) are ignored; only a disconnect ends the stream
+            while (await websocket.receive())["type"] != "websocket.disconnect":
+                pass
+
+        tasks = [asyncio.create_task(forward()), asyncio.create_task(watch())]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        for task in done:
+            error = task.exception()
+            if error is not None and not isinstance(error, WebSocketDisconnect):
+                raise error
@@ -0,0 +1,21 @@
+# app/utils/cursor.py
+import base64
+import json
+from typing import List
+
+
+def encode_cursor(values: List) -> str:
+    """Opaque, URL-safe pagination cursor holding the sort key of the last item of a page."""
+    raw = json.dumps(values, default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str, size: int) -> List:
+    """Raise ValueError for cursors that were not produced by encode_cursor."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return values
@@ -0,0 +1,108 @@
+# app/utils/export.py
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, List
+from quizzly.db import submissions
+from quizzly.db.mongodb import db
+
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+BASE_COLUMNS = ["quiz_id", "quiz_name", "name", "score", "total", "percentage",
+                "exec_time", "start_time", "end_time"]
+BATCH_SIZE = 500
+FLUSH_BYTES = 64 * 1024
+
+
+def _value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+async def _quiz_rows(quiz: dict) -> AsyncIterator[dict]:
+    total = len(quiz.get("questions", []))
+    cursor = submissions.collection.find(
+        {"quiz_id": quiz["_id"], "submitted": True},
+        {"name": 1, "score": 1, "exec_time": 1, "start_time": 1, "end_time": 1,
+         "answers.question_index": 1, "answers.answer": 1},
+        batch_size=BATCH_SIZE,
+    ).sort("_id", 1)
+    async for doc in cursor:
+        score = doc.get("score", 0)
+        row = {
+            "quiz_id": quiz["_id"],
+            "quiz_name": quiz.get("name"),
+            "name": doc.get("name"),
+            "score": score,
+            "total": total,
+            "percentage": round(score / total * 100, 2) if total else 0,
+            "exec_time": doc.get("exec_time"),
+            "start_time": _value(doc.get("start_time")),
+            "end_time": _value(doc.get("end_time")),
+        }
+        for ans in doc.get("answers", []):
+            row[f"q{ans.get('question_index', 0) + 1}"] = ans.get("answer")
+        yield row
+
+
+async def result_rows(quiz_filter: dict) -> AsyncIterator[dict]:
+    """One row per submission of every quiz matching `quiz_filter`, oldest quiz first."""
+    cursor = db.quizzes.find(quiz_filter, {"name": 1, "questions.answer": 1}).sort("created_at", 1)
+    async for quiz in cursor:
+        async for row in _quiz_rows(quiz):
+            yield row
+
+
+async def max_questions(quiz_filter: dict) -> int:
+    rows = await db.quizzes.aggregate([
+        {"$match": quiz_filter},
+        {"$group": {"_id": None, "n": {"$max": {"$size": {"$ifNull": ["$questions", []]}}}}},
+    ]).to_list(1)
+    return rows[0]["n"] if rows else 0
+
+
+def answer_columns(num_questions: int) -> List[str]:
+    return [f"q{i + 1}" for i in range(num_questions)]
+
+
+async def encode_ndjson(rows: AsyncIterator[dict], columns: List[str]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    async for row in rows:
+        buffer.write(json.dumps({c: row.get(c) for c in columns}))
+        buffer.write("\n")
+        if buffer.tell() >= FLUSH_BYTES:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+async def encode_csv(rows: AsyncIterator[dict], columns: List[str]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    async for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= FLUSH_BYTES:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+async def gzip_stream(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+async def export_stream(quiz_filter: dict, fmt: str, gzip: bool) -> AsyncIterator[bytes]:
+    columns = BASE_COLUMNS + answer_columns(await max_questions(quiz_filter))
+    encode = encode_csv if fmt == "csv" else encode_ndjson
+    stream = encode(result_rows(quiz_filter), columns)
+    return gzip_stream(stream) if gzip else stream
@@ -1,13 +1,78 @@
-import requests
+import httpx
 import json
 import re
+import time
+from typing import AsyncIterator, List, Optional
 from quizzly.core.config import settings
+from quizzly.utils import metrics
 
 GEMINI_API_KEY = settings.GEMINI_API_KEY
+GEMINI_URL = f"{settings.GEMINI_BASE_URL}/v1beta/models/{settings.GEMINI_MODEL}:generateContent"
+GEMINI_STREAM_URL = f"{settings.GEMINI_BASE_URL}/v1beta/models/{settings.GEMINI_MODEL}:streamGenerateContent"
 
+REQUEST_DURATION = metrics.histogram(
+    "gemini_request_duration_seconds",
+    "Time spent on Gemini calls, by operation (generate or stream).",
+    ("operation",),
+)
+REQUESTS = metrics.counter(
+    "gemini_requests_total",
+    "Gemini calls by operation and outcome (ok, timeout, http_error, error).",
+    ("operation", "outcome"),
+)
+PROMPT_BYTES = metrics.histogram(
+    "gemini_prompt_bytes", "Size of the prompts sent to Gemini.", ("operation",), buckets=metrics.SIZE_BUCKETS
+)
+RESPONSE_BYTES = metrics.histogram(
+    "gemini_response_bytes", "Size of Gemini response bodies.", ("operation",), buckets=metrics.SIZE_BUCKETS
+)
 
-def generate_questions(subject: str, topic: str, num_questions: int, difficulty_level: int):
-    PROMPT_TEMPLATE = f"""
+
+def _record(operation: str, outcome: str, started: float):
+    REQUEST_DURATION.observe(time.perf_counter() - started, operation=operation)
+    REQUESTS.inc(operation=operation, outcome=outcome)
+
+
+# Shared pooled client, opened/closed with the app lifespan (see quizzly/main.py)
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _build_client() -> httpx.AsyncClient:
+    timeout = httpx.Timeout(
+        settings.GEMINI_READ_TIMEOUT,
+        connect=settings.GEMINI_CONNECT_TIMEOUT,
+    )
+    limits = httpx.Limits(
+        max_connections=settings.GEMINI_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.GEMINI_MAX_CONNECTIONS,
+    )
+    return httpx.AsyncClient(timeout=timeout, limits=limits)
+
+
+async def init_client():
+    global _client
+    if _client is None:
+        _client = _build_client()
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        # Fallback for code paths running outside the app lifespan (scripts, tests)
+        _client = _build_client()
+    return _client
+
+
+def build_prompt(subject: str, topic: str, num_questions: int, difficulty_level: int,
+                 part: int = 0, parts: int = 1) -> str:
+    prompt = f"""
     You are a teaching assistant tasked with creating {num_questions} Multiple choice questions on the subject {subject} and topic {topic} with 4 choices (A,B,C,D) in the format:\n
     "questions": [
         {{
@@ -32,39 +97,189 @@ def generate_questions(subject: str, topic: str, num_questions: int, difficulty_
     Keep the difficulty according to {difficulty_level} level, where level 1 -> class 1 student should answer them and level -> 10 should be class 10 student should answer them.
     I want {num_questions} generated questions on the topic {topic} only and they should strictly be in the format as shown in the example above (as a list of dictionaries). The default value of is_correct should be false. Only include the questions in your answer, nothing else.
     """
-    url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key=" + GEMINI_API_KEY
+    if parts > 1:
+        prompt += f"""This is part {part + 1} of {parts} of the same quiz, the other parts are written separately. Focus on a different aspect of {topic} than the other parts so that no question repeats.
+    """
+    return prompt
+
 
-    payload = {
+def build_payload(prompt: str) -> dict:
+    return {
         "contents": [
             {
                 "parts": [
                     {
-                        "text": PROMPT_TEMPLATE
+                        "text": prompt
                     }
                 ]
             }
         ]
     }
 
-    # Headers to define content type and API key
+
+async def generate_questions(subject: str, topic: str, num_questions: int, difficulty_level: int,
+                             part: int = 0, parts: int = 1):
+    prompt = build_prompt(subject, topic, num_questions, difficulty_level, part, parts)
+    payload = build_payload(prompt)
+
+    # Headers to define content type
     headers = {
         "Content-Type": "application/json"
     }
 
+    PROMPT_BYTES.observe(len(prompt.encode()), operation="generate")
+    started = time.perf_counter()
+    outcome = "error"
     try:
-        response = requests.post(url, headers=headers, json=payload)
-    except Exception as e:
-        raise e
+        response = await get_client().post(
+            GEMINI_URL,
+            params={"key": GEMINI_API_KEY},
+            headers=headers,
+            json=payload,
+        )
+        RESPONSE_BYTES.observe(len(response.content), operation="generate")
 
-    if response.status_code == 200:
-        resp = extract_questions_from_gemini_response(response.content)
-        return resp
+        if response.status_code == 200:
+            resp = extract_questions_from_gemini_response(response.content)
+            outcome = "ok"
+            return resp
+        outcome = "http_error"
+    except httpx.TimeoutException:
+        outcome = "timeout"
+        raise
+    finally:
+        _record("generate", outcome, started)
 
 
-def extract_questions_from_gemini_response(response_content: bytes):
+class MalformedResponseError(ValueError):
+    """A Gemini reply, or the model output inside it, that does not have the expected shape."""
+
+
+# Where the model output sits in a generateContent reply
+_MODEL_TEXT_PATH = ("candidates", 0, "content", "parts", 0, "text")
+
+
+def _model_text(response_json) -> str:
+    value = response_json
+    for depth, step in enumerate(_MODEL_TEXT_PATH):
+        if isinstance(step, int):
+            found = isinstance(value, list) and len(value) > step
+        else:
+            found = isinstance(value, dict) and step in value
+        if not found:
+            path = ".".join(map(str, _MODEL_TEXT_PATH[:depth + 1]))
+            raise MalformedResponseError(f"Gemini reply has no {path}")
+        value = value[step]
+    if not isinstance(value, str):
+        raise MalformedResponseError("Gemini reply text is not a string")
+    return value
+
+
+def extract_questions_from_gemini_response(response_content: bytes) -> list:
     response_str = response_content.decode('utf-8')
     response_json = json.loads(response_str)
-    model_text = response_json['candidates'][0]['content']['parts'][0]['text']
+    model_text = _model_text(response_json)
     model_text = re.sub(r'^```json|```$', '', model_text.strip(), flags=re.MULTILINE).strip("`")
     parsed_output = json.loads(model_text)
-    return parsed_output.get("questions", [])
+    # Asked for {"questions": [...]}, but the model sometimes answers with the bare list
+    if isinstance(parsed_output, dict):
+        parsed_output = parsed_output.get("questions", [])
+    if not isinstance(parsed_output, list):
+        raise MalformedResponseError(f"Expected a list of questions, got {type(parsed_output).__name__}")
+    return parsed_output
+
+
+class QuestionStreamParser:
+    """
+    Incremental parser for the model output: emits every JSON object that is a direct
+    element of an array as soon as its closing brace arrives, ignoring code fences and
+    any surrounding text. A malformed object is skipped without losing the others.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._start: Optional[int] = None
+
+    def feed(self, text: str) -> List[dict]:
+        self._buffer += text
+        found = []
+        while self._pos < len(self._buffer):
+            ch = self._buffer[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "[{":
+                if ch == "{" and self._stack and self._stack[-1] == "[" and self._start is None:
+                    self._start = self._pos
+                self._stack.append(ch)
+            elif ch in "]}":
+                if self._stack:
+                    self._stack.pop()
+                if ch == "}" and self._start is not None and self._stack and self._stack[-1] == "[":
+                    try:
+                        obj = json.loads(self._buffer[self._start:self._pos + 1])
+                        if isinstance(obj, dict):
+                            found.append(obj)
+                    except json.JSONDecodeError:
+                        pass
+                    self._start = None
+            self._pos += 1
+        self._compact()
+        return found
+
+    def _compact(self):
+        # Drop consumed text that can no longer be part of a pending object
+        cut = self._start if self._start is not None else self._pos
+        if cut:
+            self._buffer = self._buffer[cut:]
+            self._pos -= cut
+            if self._start is not None:
+                self._start = 0
+
+
+async def stream_questions(subject: str, topic: str, num_questions: int, difficulty_level: int) -> AsyncIterator[dict]:
+    prompt = build_prompt(subject, topic, num_questions, difficulty_level)
+    parser = QuestionStreamParser()
+    PROMPT_BYTES.observe(len(prompt.encode()), operation="stream")
+    started = time.perf_counter()
+    outcome = "error"
+    received = 0
+    try:
+        async with get_client().stream(
+            "POST",
+            GEMINI_STREAM_URL,
+            params={"key": GEMINI_API_KEY, "alt": "sse"},
+            json=build_payload(prompt),
+        ) as response:
+            if response.status_code != 200:
+                outcome = "http_error"
+                return
+            async for line in response.aiter_lines():
+                received += len(line) + 1
+                if not line.startswith("data:"):
+                    continue
+                try:
+                    chunk = json.loads(line[len("data:"):])
+                    parts = chunk["candidates"][0]["content"]["parts"]
+                except (json.JSONDecodeError, KeyError, IndexError):
+                    continue
+                for part in parts:
+                    for question in parser.feed(part.get("text", "")):
+                        yield question
+            outcome = "ok"
+    except httpx.TimeoutException:
+        outcome = "timeout"
+        raise
+    finally:
+        RESPONSE_BYTES.observe(received, operation="stream")
+        _record("stream", outcome, started)
@@ -0,0 +1,105 @@
+# app/utils/generation.py
+import asyncio
+import json
+import random
+from typing import Callable, List, Optional
+
+import httpx
+
+from quizzly.core.config import settings
+from quizzly.utils import metrics
+from quizzly.utils.gemini import MalformedResponseError, generate_questions
+from quizzly.utils.question_bank import validate_questions
+
+CHUNK_RETRIES = metrics.counter(
+    "gemini_chunk_retries_total",
+    "Question chunks requested again after a failed, truncated or empty Gemini response.",
+)
+
+# Failures worth another attempt: transport errors and unparsable or malformed model
+# output. Anything else is a bug and is not retried
+RETRYABLE_ERRORS = (httpx.HTTPError, json.JSONDecodeError, MalformedResponseError)
+
+
+def plan_chunks(count: int, chunk_size: int) -> List[int]:
+    """Split `count` into as few chunks of at most `chunk_size` as possible, evenly sized."""
+    if count <= 0:
+        return []
+    chunks = -(-count // chunk_size)
+    size, extra = divmod(count, chunks)
+    return [size + 1] * extra + [size] * (chunks - extra)
+
+
+def _question_key(question: dict) -> str:
+    return " ".join(question["question"].lower().split())
+
+
+async def _generate_chunk(subject: str, topic: str, size: int, difficulty_level: int,
+                          part: int, parts: int, semaphore: asyncio.Semaphore) -> List[dict]:
+    """One chunk, validated question by question; retried with full-jitter backoff."""
+    for attempt in range(settings.GEMINI_CHUNK_RETRIES + 1):
+        if attempt:
+            CHUNK_RETRIES.inc()
+            await asyncio.sleep(random.uniform(0, settings.GEMINI_RETRY_BASE_DELAY * 2 ** (attempt - 1)))
+        try:
+            async with semaphore:
+                raw = await generate_questions(subject, topic, size, difficulty_level, part, parts)
+        except RETRYABLE_ERRORS:
+            if attempt == settings.GEMINI_CHUNK_RETRIES:
+                raise
+            continue
+        questions = validate_questions(raw)
+        if questions:
+            # A short chunk is kept, the merge asks for the missing questions again
+            return questions
+    return []
+
+
+async def generate_quiz_questions(subject: str, topic: str, num_questions: int, difficulty_level: int,
+                                  accept: Optional[Callable[[dict], bool]] = None) -> List[dict]:
+    """
+    Generate `num_questions` validated questions as concurrent chunks of at most
+    GEMINI_CHUNK_SIZE, at most GEMINI_CHUNK_CONCURRENCY in flight. Exact duplicates and
+    questions `accept` turns down are dropped and the gap is requested again, for up to
+    GEMINI_CHUNK_RETRIES extra rounds.
+    May return fewer questions than requested; raises the first chunk error only if
+    nothing at all could be generated.
+    """
+    semaphore = asyncio.Semaphore(settings.GEMINI_CHUNK_CONCURRENCY)
+    merged = []
+    seen = set()
+    errors = []
+    parts_so_far = 0
+    for _ in range(settings.GEMINI_CHUNK_RETRIES + 1):
+        sizes = plan_chunks(num_questions - len(merged), settings.GEMINI_CHUNK_SIZE)
+        if not sizes:
+            break
+        parts = parts_so_far + len(sizes)
+        results = await asyncio.gather(
+            *(
+                _generate_chunk(subject, topic, size, difficulty_level, parts_so_far + i, parts, semaphore)
+                for i, size in enumerate(sizes)
+            ),
+            return_exceptions=True
+        )
+        parts_so_far = parts
+
+        added = 0
+        for result in results:
+            if isinstance(result, Exception):
+                errors.append(result)
+                continue
+            for question in result:
+                key = _question_key(question)
+                if key not in seen:
+                    seen.add(key)
+                    if accept is not None and not accept(question):
+                        continue
+                    merged.append(question)
+                    added += 1
+        if not added:
+            break
+
+    if not merged and errors:
+        raise errors[0]
+    return merged[:num_questions]
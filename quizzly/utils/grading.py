@@ -0,0 +1,59 @@
+# app/utils/grading.py
+from typing import List
+import numpy as np
+from pymongo import UpdateOne
+from quizzly.db import submissions
+
+# Choices encoded as small integers, 0 means unanswered / not a valid choice
+ANSWER_CODES = {"A": 1, "B": 2, "C": 3, "D": 4}
+
+
+def encode_answers(answers: List[str]) -> np.ndarray:
+    return np.fromiter((ANSWER_CODES.get(a, 0) for a in answers), dtype=np.uint8, count=len(answers))
+
+
+async def regrade_quiz(quiz_id: str, answer_key: List[str]) -> dict:
+    """
+    Re-grade every submission of a quiz against `answer_key`: responses are loaded as a
+    participants x questions uint8 matrix, compared with the key in one vectorized
+    operation, and only the rows whose grading changed are written back in one bulk_write.
+    """
+    num_questions = len(answer_key)
+    docs = await submissions.collection.find(
+        {"quiz_id": quiz_id, "submitted": True},
+        {"answers": 1, "score": 1}
+    ).to_list(None)
+    if not docs:
+        return {"regraded": 0, "updated": 0}
+
+    matrix = np.zeros((len(docs), num_questions), dtype=np.uint8)
+    old_flags = np.zeros((len(docs), num_questions), dtype=bool)
+    for row, doc in enumerate(docs):
+        for ans in doc.get("answers", []):
+            index = ans.get("question_index")
+            if index is not None and 0 <= index < num_questions:
+                matrix[row, index] = ANSWER_CODES.get(ans.get("answer"), 0)
+                old_flags[row, index] = bool(ans.get("is_correct"))
+
+    key = encode_answers(answer_key)
+    correct = (matrix == key) & (matrix != 0)
+    scores = correct.sum(axis=1)
+    old_scores = np.fromiter((doc.get("score", 0) for doc in docs), dtype=np.int64, count=len(docs))
+    changed = np.flatnonzero((scores != old_scores) | (correct != old_flags).any(axis=1))
+
+    ops = []
+    for row in changed.tolist():
+        doc = docs[row]
+        flags = correct[row].tolist()
+        answers = []
+        for ans in doc.get("answers", []):
+            index = ans.get("question_index")
+            is_correct = index is not None and 0 <= index < num_questions and flags[index]
+            answers.append({**ans, "is_correct": bool(is_correct)})
+        ops.append(UpdateOne(
+            {"_id": doc["_id"]},
+            {"$set": {"answers": answers, "score": int(scores[row])}}
+        ))
+    if ops:
+        await submissions.collection.bulk_write(ops, ordered=False)
+    return {"regraded": len(docs), "updated": len(ops)}
@@ -0,0 +1,260 @@
+# app/utils/jobs.py
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+from bson import ObjectId
+from pymongo import ASCENDING, ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+MAX_BACKOFF_SECONDS = 30
+
+
+def new_job(kind: str, owner: str, payload: dict) -> dict:
+    now = datetime.utcnow()
+    return {
+        "_id": str(ObjectId()),
+        "kind": kind,
+        "owner": owner,
+        "payload": payload,
+        "status": QUEUED,
+        "result": None,
+        "error": None,
+        "created_at": now,
+        "claimed_at": None,
+        # Set anew by every claim; renew() and finish() only apply for the current one
+        "claim": None,
+        "finished_at": None,
+    }
+
+
+class MongoJobQueue:
+    """Job queue stored in a Mongo collection; safe to share between workers."""
+
+    def __init__(self, collection, lease_seconds: int):
+        self.collection = collection
+        self.lease_seconds = lease_seconds
+
+    async def ensure_indexes(self):
+        await self.collection.create_index([("status", ASCENDING), ("created_at", ASCENDING)])
+        await self.collection.create_index([("owner", ASCENDING), ("status", ASCENDING)])
+
+    async def enqueue(self, job: dict, max_active: Optional[int] = None) -> bool:
+        """
+        Add the job; with `max_active`, only if the owner then has at most that many
+        queued or running jobs. The job is inserted unclaimable and admitted only if it
+        is among the owner's first `max_active` active jobs in creation order, so racing
+        requests cannot both get in. Returns whether the job was enqueued.
+        """
+        if max_active is None:
+            await self.collection.insert_one(job)
+            return True
+        await self.collection.insert_one({**job, "admitted": False})
+        # Unadmitted jobs of a process that died before deciding stop counting after a lease
+        undecided_since = datetime.utcnow() - timedelta(seconds=self.lease_seconds)
+        ahead = await self.collection.count_documents({
+            "owner": job["owner"],
+            "status": {"$in": [QUEUED, RUNNING]},
+            "$and": [
+                {"$or": [{"admitted": {"$ne": False}}, {"created_at": {"$gte": undecided_since}}]},
+                {"$or": [
+                    {"created_at": {"$lt": job["created_at"]}},
+                    {"created_at": job["created_at"], "_id": {"$lte": job["_id"]}},
+                ]},
+            ],
+        })
+        if ahead > max_active:
+            await self.collection.delete_one({"_id": job["_id"]})
+            return False
+        await self.collection.update_one({"_id": job["_id"]}, {"$unset": {"admitted": ""}})
+        return True
+
+    async def claim(self) -> Optional[dict]:
+        now = datetime.utcnow()
+        expired = now - timedelta(seconds=self.lease_seconds)
+        return await self.collection.find_one_and_update(
+            {"admitted": {"$ne": False}, "$or": [
+                {"status": QUEUED},
+                {"status": RUNNING, "claimed_at": {"$lt": expired}},
+            ]},
+            {"$set": {"status": RUNNING, "claimed_at": now, "claim": str(ObjectId())}},
+            sort=[("created_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def renew(self, job: dict) -> bool:
+        """Extend the lease of a claimed job; False once another worker has claimed it."""
+        result = await self.collection.update_one(
+            {"_id": job["_id"], "status": RUNNING, "claim": job["claim"]},
+            {"$set": {"claimed_at": datetime.utcnow()}},
+        )
+        return result.matched_count == 1
+
+    async def finish(self, job: dict, status: str, result=None, error: Optional[str] = None) -> bool:
+        """Record the outcome, unless the lease was lost and the job claimed again."""
+        update = await self.collection.update_one(
+            {"_id": job["_id"], "claim": job["claim"]},
+            {"$set": {
+                "status": status,
+                "result": result,
+                "error": error,
+                "finished_at": datetime.utcnow(),
+            }},
+        )
+        return update.matched_count == 1
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return await self.collection.find_one({"_id": job_id})
+
+
+class InMemoryJobQueue:
+    """Process-local job queue, used in tests and single-worker deployments."""
+
+    def __init__(self, lease_seconds: int):
+        self.lease_seconds = lease_seconds
+        self.jobs: Dict[str, dict] = {}
+
+    async def ensure_indexes(self):
+        pass
+
+    async def enqueue(self, job: dict, max_active: Optional[int] = None) -> bool:
+        # No await between the check and the insert, so this is atomic within the process
+        if max_active is not None and await self.count_active(job["owner"]) >= max_active:
+            return False
+        self.jobs[job["_id"]] = dict(job)
+        return True
+
+    async def claim(self) -> Optional[dict]:
+        now = datetime.utcnow()
+        expired = now - timedelta(seconds=self.lease_seconds)
+        for job in sorted(self.jobs.values(), key=lambda j: j["created_at"]):
+            if job["status"] == QUEUED or (job["status"] == RUNNING and job["claimed_at"] < expired):
+                job.update(status=RUNNING, claimed_at=now, claim=str(ObjectId()))
+                return dict(job)
+        return None
+
+    def _claimed(self, job: dict) -> Optional[dict]:
+        stored = self.jobs.get(job["_id"])
+        if stored is None or stored["claim"] != job["claim"]:
+            return None
+        return stored
+
+    async def renew(self, job: dict) -> bool:
+        stored = self._claimed(job)
+        if stored is None or stored["status"] != RUNNING:
+            return False
+        stored["claimed_at"] = datetime.utcnow()
+        return True
+
+    async def finish(self, job: dict, status: str, result=None, error: Optional[str] = None) -> bool:
+        stored = self._claimed(job)
+        if stored is None:
+            return False
+        stored.update(status=status, result=result, error=error, finished_at=datetime.utcnow())
+        return True
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        job = self.jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+    async def count_active(self, owner: str) -> int:
+        return sum(1 for j in self.jobs.values() if j["owner"] == owner and j["status"] in (QUEUED, RUNNING))
+
+
+class JobWorkerPool:
+    """
+    Fixed number of asyncio workers pulling jobs from a queue, which bounds the number
+    of jobs running at the same time in this process (not across processes). While a
+    job runs its lease is renewed; a job whose lease was lost anyway is cancelled here,
+    since another worker has claimed it.
+    """
+
+    def __init__(self, queue, handler: Callable[[dict], Awaitable[dict]], concurrency: int, poll_interval: float):
+        self.queue = queue
+        self.handler = handler
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self):
+        await self.queue.ensure_indexes()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, job: dict, max_active: Optional[int] = None) -> bool:
+        """Enqueue the job (see enqueue for `max_active`); returns whether it was accepted."""
+        if not await self.queue.enqueue(job, max_active):
+            return False
+        self._wakeup.set()
+        return True
+
+    async def _worker(self):
+        failures = 0
+        while True:
+            try:
+                claimed = await self._run_next()
+                failures = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Queue unreachable: back off and keep the worker alive. A job whose
+                # finish() failed is claimed again once its lease expires
+                failures += 1
+                logger.exception("Job worker iteration failed")
+                await asyncio.sleep(min(self.poll_interval * 2 ** failures, MAX_BACKOFF_SECONDS))
+                continue
+            if not claimed:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _run_next(self) -> bool:
+        job = await self.queue.claim()
+        if job is None:
+            return False
+        handler = asyncio.create_task(self.handler(job))
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            await asyncio.wait((handler, heartbeat), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            heartbeat.cancel()
+            if not handler.done():
+                handler.cancel()
+                await asyncio.wait((handler,))
+        if handler.cancelled():
+            logger.warning("Job %s lost its lease to another worker", job["_id"])
+            return True
+        error = handler.exception()
+        if error is not None:
+            logger.error("Job %s failed", job["_id"], exc_info=error)
+            finished = await self.queue.finish(job, FAILED, error=str(error))
+        else:
+            finished = await self.queue.finish(job, DONE, result=handler.result())
+        if not finished:
+            logger.warning("Job %s was claimed again before it finished", job["_id"])
+        return True
+
+    async def _heartbeat(self, job: dict):
+        """Renew the job's lease every third of it; returns once the lease is lost."""
+        while True:
+            await asyncio.sleep(self.queue.lease_seconds / 3)
+            try:
+                if not await self.queue.renew(job):
+                    return
+            except Exception:
+                # Keep the job running: the lease is still good until it expires
+                logger.exception("Renewing the lease of job %s failed", job["_id"])
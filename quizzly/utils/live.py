@@ -0,0 +1,321 @@
+# app/utils/live.py
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from quizzly.db import submissions
+from quizzly.db.mongodb import db
+
+logger = logging.getLogger(__name__)
+
+# Quiz-level fields a live session owns while it is active
+QUIZ_STATE_FIELDS = ("is_started", "is_executed", "start_time", "end_time", "exec_time")
+
+DUPLICATE_KEY = 11000
+
+
+def _participant_write(quiz_id: str, name: str, participant: dict) -> UpdateOne:
+    # Writes never replace a submitted record: a registration only creates the document,
+    # and a submission only lands if the stored one is not submitted yet. Otherwise the
+    # upsert hits the unique (quiz_id, name) index
+    if not participant.get("submitted"):
+        return UpdateOne({"quiz_id": quiz_id, "name": name}, {"$setOnInsert": participant}, upsert=True)
+    return UpdateOne(
+        {"quiz_id": quiz_id, "name": name, "submitted": {"$ne": True}},
+        {"$set": participant},
+        upsert=True
+    )
+
+
+class LiveSession:
+    """
+    In-memory state of one active quiz: answer key, quiz state and every participant's
+    submission document. Changes are recorded as dirty and written back in batches by
+    LiveSessionManager, so handlers never wait on Mongo while the quiz is running.
+    With several workers each holds its own session: participants it has not seen are
+    looked up in Mongo, and the submissions collection stays the judge of who submitted.
+    Quiz state is written field by field, and start/end go through transition(), which
+    only succeeds against the stored state.
+    """
+
+    def __init__(self, quiz: dict, participants: List[dict]):
+        self.quiz = quiz
+        self.quiz_id = quiz["_id"]
+        self.created_by = quiz.get("created_by")
+        self.password = quiz.get("password")
+        self.questions = quiz.get("questions", [])
+        self.answer_key = [q.get("answer") for q in self.questions]
+        self.state = {field: quiz.get(field) for field in QUIZ_STATE_FIELDS}
+        self.participants: Dict[str, dict] = {p["name"]: p for p in participants}
+        self.dirty_participants = set()
+        self.dirty_state = set()
+        # Submissions another worker had already stored; see LiveSessionManager.commit()
+        self.conflicts = set()
+        self.last_used = time.monotonic()
+        self.flush_lock = asyncio.Lock()
+
+    def current_quiz(self) -> dict:
+        """The quiz document as it will be once pending changes are flushed."""
+        return {**self.quiz, **self.state}
+
+    def touch(self):
+        self.last_used = time.monotonic()
+
+    def set_state(self, **fields) -> bool:
+        """Update quiz-level fields; returns whether anything changed."""
+        changed = {k: v for k, v in fields.items() if self.state.get(k) != v}
+        if changed:
+            self.state.update(changed)
+            self.dirty_state |= changed.keys()
+        return bool(changed)
+
+    def mark_dirty(self, name: str):
+        self.dirty_participants.add(name)
+
+    @property
+    def pending(self) -> int:
+        return len(self.dirty_participants) + int(bool(self.dirty_state))
+
+    async def flush(self) -> int:
+        """Write pending changes; on failure they stay pending for the next flush."""
+        async with self.flush_lock:
+            names, self.dirty_participants = self.dirty_participants, set()
+            ordered_names = list(names)
+            operations = [
+                _participant_write(self.quiz_id, name, dict(self.participants[name]))
+                for name in ordered_names
+            ]
+            try:
+                if operations:
+                    try:
+                        await submissions.collection.bulk_write(operations, ordered=False)
+                    except BulkWriteError as e:
+                        errors = e.details.get("writeErrors", [])
+                        if any(error.get("code") != DUPLICATE_KEY for error in errors):
+                            raise
+                        # Submitted through another worker first: keep the stored record
+                        rejected = [ordered_names[error["index"]] for error in errors]
+                        self.conflicts.update(rejected)
+                        await self.reload(rejected)
+            except Exception:
+                self.dirty_participants |= names
+                raise
+            state_writes = await self._write_state()
+            return len(operations) + state_writes
+
+    async def _write_state(self) -> int:
+        # Only the fields this worker changed, so it never writes back stale ones
+        fields, self.dirty_state = self.dirty_state, set()
+        if not fields:
+            return 0
+        try:
+            await db.quizzes.update_one({"_id": self.quiz_id}, {"$set": {f: self.state[f] for f in fields}})
+        except Exception:
+            self.dirty_state |= fields
+            raise
+        return 1
+
+    async def refresh_state(self) -> dict:
+        """Write pending state, then re-read it: another worker may have moved it on."""
+        async with self.flush_lock:
+            await self._write_state()
+            quiz = await db.quizzes.find_one({"_id": self.quiz_id}, dict.fromkeys(QUIZ_STATE_FIELDS, 1))
+            if quiz:
+                self.state.update({field: quiz.get(field) for field in QUIZ_STATE_FIELDS})
+        return self.state
+
+    async def transition(self, expect: dict, **fields) -> bool:
+        """
+        Set `fields` right away, but only if the stored quiz matches the `expect` filter;
+        otherwise the state is refreshed and False returned.
+        """
+        async with self.flush_lock:
+            await self._write_state()
+            result = await db.quizzes.update_one({"_id": self.quiz_id, **expect}, {"$set": fields})
+            if result.matched_count:
+                self.state.update(fields)
+                return True
+        await self.refresh_state()
+        return False
+
+    async def reload(self, names: List[str]):
+        """Replace the given participants with their stored documents."""
+        docs = submissions.collection.find({"quiz_id": self.quiz_id, "name": {"$in": names}}, {"_id": 0})
+        async for doc in docs:
+            self.participants[doc["name"]] = doc
+
+
+class LiveSessionManager:
+    """
+    Keeps a LiveSession per active quiz and flushes them every `flush_interval` seconds,
+    or sooner once `batch_size` changes are pending. Sessions idle for `idle_timeout`
+    seconds are flushed and dropped; stop() flushes everything. While a quiz is being
+    edited (see editing()) its session is not loaded again.
+    """
+
+    def __init__(self, flush_interval: float, batch_size: int, idle_timeout: float):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.idle_timeout = idle_timeout
+        self._sessions: Dict[str, LiveSession] = {}
+        self._activating: Dict[str, asyncio.Task] = {}
+        self._editing: Dict[str, asyncio.Event] = {}
+        # Bumped by every edit, so a load that overlapped one is thrown away
+        self._generation = 0
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"changes": 0, "flushes": 0, "writes": 0}
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush_all()
+        self._sessions.clear()
+
+    async def get(self, quiz_id: str, participant: Optional[str] = None) -> Optional[LiveSession]:
+        """
+        The quiz's session, loading it from Mongo on first use; None if the quiz is gone.
+        `participant`, if the session does not know them yet, is looked up in Mongo too.
+        The returned session is current: callers may mutate it before their next await.
+        """
+        while True:
+            session = self._sessions.get(quiz_id)
+            if session is None:
+                # Concurrent first requests share one load
+                task = self._activating.get(quiz_id)
+                if task is None:
+                    task = self._activating[quiz_id] = asyncio.ensure_future(self._activate(quiz_id))
+                    task.add_done_callback(lambda _: self._activating.pop(quiz_id, None))
+                session = await asyncio.shield(task)
+                if session is None:
+                    return None
+            if participant is not None and participant not in session.participants:
+                doc = await submissions.collection.find_one({"quiz_id": quiz_id, "name": participant}, {"_id": 0})
+                if doc is not None:
+                    session.participants.setdefault(participant, doc)
+            # Closed while we waited: go again rather than mutate a dropped session
+            if self._sessions.get(quiz_id) is session:
+                session.touch()
+                return session
+
+    async def _wait_for_edit(self, quiz_id: str):
+        done = self._editing.get(quiz_id)
+        while done is not None:
+            await done.wait()
+            done = self._editing.get(quiz_id)
+
+    async def _activate(self, quiz_id: str) -> Optional[LiveSession]:
+        while True:
+            await self._wait_for_edit(quiz_id)
+            generation = self._generation
+            quiz = await db.quizzes.find_one({"_id": quiz_id})
+            if not quiz:
+                return None
+            participants = await submissions.collection.find({"quiz_id": quiz_id}, {"_id": 0}).to_list(None)
+            if generation == self._generation:
+                session = self._sessions[quiz_id] = LiveSession(quiz, participants)
+                return session
+
+    def changed(self, session: LiveSession):
+        """Call after mutating a session; wakes the flusher once the batch is full."""
+        self.stats["changes"] += 1
+        if sum(s.pending for s in self._sessions.values()) >= self.batch_size:
+            self._wakeup.set()
+
+    async def flush(self, quiz_id: str):
+        """Make the quiz's pending changes durable before reading it from Mongo."""
+        session = self._sessions.get(quiz_id)
+        if session is not None and session.pending:
+            await self._flush_session(session)
+
+    async def commit(self, session: LiveSession, name: str) -> bool:
+        """
+        Flush the session now and report whether `name`'s submission was stored. Handlers
+        waiting at once share one batch; False means another worker had stored one first.
+        """
+        await self._flush_session(session)
+        if name in session.conflicts:
+            session.conflicts.discard(name)
+            return False
+        return True
+
+    async def flush_owner(self, created_by: str):
+        for session in list(self._sessions.values()):
+            if session.created_by == created_by and session.pending:
+                await self._flush_session(session)
+
+    async def flush_all(self):
+        for session in list(self._sessions.values()):
+            if session.pending:
+                await self._flush_session(session)
+
+    async def close(self, quiz_id: str):
+        """Flush and drop the session, e.g. before its answer key changes."""
+        await self.flush(quiz_id)
+        self._sessions.pop(quiz_id, None)
+
+    async def discard(self, quiz_id: str):
+        """Drop the session without writing it, for deleted quizzes."""
+        session = self._sessions.pop(quiz_id, None)
+        if session is not None:
+            # Wait out a flush in progress so it cannot land after the delete
+            async with session.flush_lock:
+                session.dirty_participants.clear()
+                session.dirty_state.clear()
+
+    @asynccontextmanager
+    async def editing(self, quiz_id: str, discard: bool = False):
+        """
+        Hold the quiz out of play while its document or submissions change: the session
+        is flushed (or discarded) and dropped, and the next start or submit loads the
+        quiz again only once the block has exited. Edits of one quiz run one at a time.
+        """
+        await self._wait_for_edit(quiz_id)
+        done = self._editing[quiz_id] = asyncio.Event()
+        self._generation += 1
+        try:
+            if discard:
+                await self.discard(quiz_id)
+            else:
+                await self.close(quiz_id)
+            yield
+        finally:
+            del self._editing[quiz_id]
+            done.set()
+
+    async def _flush_session(self, session: LiveSession):
+        writes = await session.flush()
+        if writes:
+            self.stats["flushes"] += 1
+            self.stats["writes"] += writes
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            now = time.monotonic()
+            for quiz_id, session in list(self._sessions.items()):
+                try:
+                    if session.pending:
+                        await self._flush_session(session)
+                    if now - session.last_used > self.idle_timeout and not session.pending:
+                        self._sessions.pop(quiz_id, None)
+                except Exception:
+                    logger.exception("Flushing live session %s failed", quiz_id)
@@ -0,0 +1,232 @@
+# app/utils/profiler.py
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+# Synthetic leaf frames for samples taken while the profiled task was not on the CPU
+AWAITING_IO = "<awaiting I/O>"
+WAITING_FOR_LOOP = "<ready, waiting for the event loop>"
+
+
+def _frame_key(frame) -> tuple:
+    code = frame.f_code
+    return code.co_name, code.co_filename, frame.f_lineno
+
+
+def _coroutine_frames(task: asyncio.Task) -> list:
+    """Frames of the task's coroutine chain, outermost first."""
+    frames = []
+    awaitable = task.get_coro()
+    while awaitable is not None:
+        frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "ag_frame", None) \
+            or getattr(awaitable, "gi_frame", None)
+        if frame is None:
+            break
+        frames.append(frame)
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "ag_await", None) \
+            or getattr(awaitable, "gi_yieldfrom", None)
+    return frames
+
+
+def _is_ready(task: asyncio.Task) -> bool:
+    # A suspended task whose future already completed is only queued behind other work
+    waiter = getattr(task, "_fut_waiter", None)
+    return waiter is None or waiter.done()
+
+
+class Profile:
+    """Samples collected for one request, as frame-table indices (root first)."""
+
+    def __init__(self, task: asyncio.Task, thread_id: int, meta: dict):
+        self.id = uuid.uuid4().hex[:12]
+        self.task = task
+        self.thread_id = thread_id
+        self.meta = meta
+        self.frames: List[tuple] = []
+        self._frame_index: Dict[tuple, int] = {}
+        self.samples: List[List[int]] = []
+        self.weights: List[float] = []
+        self.last_sample = time.perf_counter()
+        self.closed = False
+        self._lock = threading.Lock()
+
+    def _index(self, key: tuple) -> int:
+        index = self._frame_index.get(key)
+        if index is None:
+            index = self._frame_index[key] = len(self.frames)
+            self.frames.append(key)
+        return index
+
+    def sample(self, thread_frame, now: float):
+        with self._lock:
+            if not self.closed:
+                self._sample(thread_frame, now)
+
+    def _sample(self, thread_frame, now: float):
+        chain = _coroutine_frames(self.task)
+        if not chain:
+            return
+        # The task is on the CPU when its innermost coroutine frame is on the loop thread's stack
+        running = False
+        stack = []
+        frame = thread_frame
+        while frame is not None:
+            stack.append(frame)
+            if frame is chain[-1]:
+                running = True
+            frame = frame.f_back
+        if running:
+            keys = [_frame_key(f) for f in reversed(stack)]
+        else:
+            keys = [_frame_key(f) for f in chain]
+            keys.append((WAITING_FOR_LOOP if _is_ready(self.task) else AWAITING_IO, "", 0))
+        self.samples.append([self._index(key) for key in keys])
+        self.weights.append((now - self.last_sample) * 1000)
+        self.last_sample = now
+
+    def close(self) -> dict:
+        """Stop taking samples and return the profile as a JSON-serializable dict."""
+        with self._lock:
+            self.closed = True
+            self.task = None
+        return {
+            **self.meta,
+            "id": self.id,
+            "frames": self.frames,
+            "samples": self.samples,
+            "weights": [round(w, 3) for w in self.weights],
+        }
+
+
+class Sampler:
+    """
+    One daemon thread that, every `interval` seconds, samples each active Profile from
+    the stack of its event loop thread. It sleeps while nothing is being profiled.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._active: Dict[str, Profile] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, profile: Profile):
+        with self._lock:
+            self._active[profile.id] = profile
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def stop(self, profile: Profile):
+        with self._lock:
+            self._active.pop(profile.id, None)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                profiles = list(self._active.values())
+            if not profiles:
+                self._wakeup.clear()
+                self._wakeup.wait()
+                continue
+            frames = sys._current_frames()
+            now = time.perf_counter()
+            for profile in profiles:
+                thread_frame = frames.get(profile.thread_id)
+                if thread_frame is not None:
+                    profile.sample(thread_frame, now)
+            del frames
+            time.sleep(self.interval)
+
+
+class ProfileStore:
+    """Bounded ring buffer of profiles on disk: the oldest files go once `max_files` is exceeded."""
+
+    def __init__(self, directory: str, max_files: int):
+        self.directory = directory
+        self.max_files = max_files
+
+    def _files(self) -> List[str]:
+        try:
+            names = [n for n in os.listdir(self.directory) if n.endswith(".json")]
+        except FileNotFoundError:
+            return []
+        return sorted(names)
+
+    def save(self, profile: dict):
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{int(profile['started_at'] * 1000):015d}-{profile['id']}.json"
+        tmp = os.path.join(self.directory, name + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(profile, f, separators=(",", ":"))
+        os.replace(tmp, os.path.join(self.directory, name))
+        for old in self._files()[:-self.max_files]:
+            try:
+                os.remove(os.path.join(self.directory, old))
+            except FileNotFoundError:
+                pass
+
+    def list(self) -> List[dict]:
+        summaries = []
+        for name in reversed(self._files()):
+            profile = self.load(name.rsplit("-", 1)[1][:-len(".json")])
+            if profile is not None:
+                summaries.append({k: v for k, v in profile.items() if k not in ("frames", "samples", "weights")})
+        return summaries
+
+    def load(self, profile_id: str) -> Optional[dict]:
+        for name in self._files():
+            if name.endswith(f"-{profile_id}.json"):
+                try:
+                    with open(os.path.join(self.directory, name)) as f:
+                        return json.load(f)
+                except (FileNotFoundError, ValueError):
+                    return None
+        return None
+
+
+def _frame_name(frame: list) -> str:
+    name, filename, line = frame
+    return f"{name} ({filename}:{line})" if filename else name
+
+
+def to_collapsed(profile: dict) -> str:
+    """Brendan Gregg's collapsed stacks: `root;...;leaf <sample count>` per distinct stack."""
+    counts: Dict[str, int] = {}
+    names = [_frame_name(frame).replace(";", ",") for frame in profile["frames"]]
+    for sample in profile["samples"]:
+        stack = ";".join(names[i] for i in sample)
+        counts[stack] = counts.get(stack, 0) + 1
+    return "".join(f"{stack} {count}\n" for stack, count in counts.items())
+
+
+def to_speedscope(profile: dict) -> dict:
+    """A single sampled profile in the speedscope file format, weighted in milliseconds."""
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {
+            "frames": [
+                {"name": name, "file": filename, "line": line} if filename else {"name": name}
+                for name, filename, line in profile["frames"]
+            ]
+        },
+        "profiles": [{
+            "type": "sampled",
+            "name": f"{profile['method']} {profile['path']}",
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": profile["duration_ms"],
+            "samples": profile["samples"],
+            "weights": profile["weights"],
+        }],
+        "name": f"{profile['method']} {profile['path']} ({profile['id']})",
+        "activeProfileIndex": 0,
+        "exporter": "quizzly",
+    }
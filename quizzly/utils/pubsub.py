@@ -0,0 +1,96 @@
+# app/utils/pubsub.py
+import asyncio
+from collections import defaultdict
+from typing import AsyncIterator, Dict, Optional, Set
+
+
+class Broker:
+    """
+    Interface for fanning out events between subscribers. The in-memory broker only
+    reaches subscribers of the same process; a broker backed by a shared service
+    (Redis pub/sub, Mongo change streams, ...) lets several workers share events.
+    """
+
+    async def publish(self, channel: str, message: dict):
+        raise NotImplementedError
+
+    def subscribe(self, channel: str) -> "Subscription":
+        raise NotImplementedError
+
+    def _unsubscribe(self, subscription: "Subscription"):
+        raise NotImplementedError
+
+
+class Subscription:
+    def __init__(self, broker: Broker, channel: str, maxsize: int):
+        self.broker = broker
+        self.channel = channel
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    def put(self, message: dict):
+        # Drop the oldest event for slow consumers instead of blocking publishers
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[dict]:
+        """Next message, or None if nothing arrived within `timeout` seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def __aiter__(self) -> AsyncIterator[dict]:
+        while True:
+            yield await self.queue.get()
+
+    def close(self):
+        self.broker._unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class InMemoryBroker(Broker):
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[Subscription]] = defaultdict(set)
+
+    async def publish(self, channel: str, message: dict):
+        for subscription in list(self._subscribers.get(channel, ())):
+            subscription.put(message)
+
+    def subscribe(self, channel: str) -> Subscription:
+        subscription = Subscription(self, channel, self.queue_size)
+        self._subscribers[channel].add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription):
+        subscribers = self._subscribers.get(subscription.channel)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.channel]
+
+
+broker: Broker = InMemoryBroker()
+
+
+def set_broker(new_broker: Broker):
+    global broker
+    broker = new_broker
+
+
+def quiz_channel(quiz_id: str) -> str:
+    return f"quiz:{quiz_id}"
+
+
+async def publish_quiz_event(quiz_id: str, event: str, **data):
+    await broker.publish(quiz_channel(quiz_id), {"type": event, "quiz_id": quiz_id, **data})
+
+
+def subscribe_quiz(quiz_id: str) -> Subscription:
+    return broker.subscribe(quiz_channel(quiz_id))
@@ -0,0 +1,97 @@
+# app/utils/question_bank.py
+import hashlib
+from datetime import datetime
+from typing import List
+from pydantic import ValidationError
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from quizzly.core.config import settings
+from quizzly.db.mongodb import db
+from quizzly.models.quiz import Question
+
+collection = db.question_bank
+
+# Process-local counters, in questions served from the bank vs. requested from Gemini
+stats = {"hits": 0, "misses": 0}
+
+
+def make_key(subject: str, topic: str, difficulty_level: int) -> str:
+    subject = " ".join(subject.lower().split())
+    topic = " ".join(topic.lower().split())
+    return f"{subject}|{topic}|{difficulty_level}"
+
+
+def _question_id(key: str, question: dict) -> str:
+    text = " ".join(question["question"].lower().split())
+    return hashlib.sha1(f"{key}|{text}".encode()).hexdigest()
+
+
+def validate_questions(questions: List[dict]) -> List[dict]:
+    valid = []
+    for q in questions or []:
+        try:
+            valid.append(Question(**q).model_dump())
+        except (ValidationError, TypeError):
+            continue
+    return valid
+
+
+async def ensure_indexes():
+    await collection.create_index(
+        [("created_at", ASCENDING)],
+        expireAfterSeconds=settings.QUESTION_BANK_TTL_SECONDS,
+    )
+    await collection.create_index([("key", ASCENDING), ("created_at", DESCENDING)])
+
+
+async def sample_questions(key: str, count: int) -> List[dict]:
+    """
+    Up to QUESTION_BANK_MAX_SHARE of `count` questions from the bank, so quizzes on the
+    same key keep getting new questions; all `count` once the key holds
+    QUESTION_BANK_FULL_MULTIPLE times that many, as repeats between quizzes are rare then.
+    """
+    if count <= 0:
+        return []
+    full = count * settings.QUESTION_BANK_FULL_MULTIPLE
+    if await collection.count_documents({"key": key}, limit=full) < full:
+        size = int(count * settings.QUESTION_BANK_MAX_SHARE)
+    else:
+        size = count
+    questions = []
+    if size > 0:
+        cursor = collection.aggregate([
+            {"$match": {"key": key}},
+            {"$sample": {"size": size}},
+            {"$project": {"_id": 0, "key": 0, "created_at": 0}},
+        ])
+        questions = await cursor.to_list(size)
+    for q in questions:
+        q["is_correct"] = False
+    stats["hits"] += len(questions)
+    stats["misses"] += count - len(questions)
+    return questions
+
+
+async def store_questions(key: str, questions: List[dict]):
+    if not questions:
+        return
+    now = datetime.utcnow()
+    ops = [
+        UpdateOne(
+            {"_id": _question_id(key, q)},
+            {"$setOnInsert": {**q, "key": key, "is_correct": False, "created_at": now}},
+            upsert=True,
+        )
+        for q in questions
+    ]
+    await collection.bulk_write(ops, ordered=False)
+    await _trim(key)
+
+
+async def _trim(key: str):
+    # Keep only the newest QUESTION_BANK_MAX_PER_KEY questions for a key
+    cursor = collection.find({"key": key}, {"_id": 1}) \
+        .sort("created_at", DESCENDING) \
+        .skip(settings.QUESTION_BANK_MAX_PER_KEY)
+    stale = [doc["_id"] async for doc in cursor]
+    if stale:
+        await collection.delete_many({"_id": {"$in": stale}})
@@ -0,0 +1,125 @@
+# app/utils/similarity.py
+import re
+import zlib
+from collections import defaultdict
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+import numpy as np
+
+# 64 MinHash permutations split into 16 LSH bands of 4 rows: pairs with a Jaccard
+# similarity of 0.5 become candidates about 64% of the time, 0.7 about 99%
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+_PRIME = np.uint64(4294967311)  # smallest prime above 2**32
+_rng = np.random.RandomState(20240601)  # fixed seed: signatures are stored and compared across processes
+_A = _rng.randint(1, 2 ** 31, size=NUM_PERM).astype(np.uint64)
+_B = _rng.randint(0, 2 ** 31, size=NUM_PERM).astype(np.uint64)
+
+# A signature is the MinHash of the question text, then one hash per choice, then the
+# hash of the correct answer's text. Questions are near-duplicates when their texts are
+# similar, their correct answers are the same and they share at least 3 of 4 choices,
+# so template variants ("Capital of France?" / "Capital of Germany?") stay distinct
+NUM_CHOICES = 4
+SIGNATURE_SIZE = NUM_PERM + NUM_CHOICES + 1
+MIN_CHOICE_OVERLAP = 0.6
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def question_text(question: dict) -> str:
+    return str(question.get("question", ""))
+
+
+def _normalize(text) -> str:
+    return " ".join(str(text).lower().split())
+
+
+def choices(question: dict) -> List[str]:
+    """Normalized choices, sorted so reordering them changes nothing."""
+    return sorted(_normalize(question.get(f"choice_{c}", "")) for c in "ABCD")
+
+
+def answer_text(question: dict) -> str:
+    answer = question.get("answer", "")
+    return _normalize(question.get(f"choice_{answer}", answer))
+
+
+def shingles(text: str) -> Set[int]:
+    """CRC32 hashes of word bigrams (single words for one-word texts)."""
+    words = _WORD.findall(text.lower())
+    grams = [" ".join(words[i:i + 2]) for i in range(len(words) - 1)] or words
+    return {zlib.crc32(gram.encode()) for gram in grams}
+
+
+def minhash(text: str) -> np.ndarray:
+    hashes = np.fromiter(shingles(text), dtype=np.uint64)
+    if hashes.size == 0:
+        return np.full(NUM_PERM, np.iinfo(np.uint32).max, dtype=np.uint32)
+    # (a * h + b) mod p for every permutation and shingle, minimum per permutation
+    permuted = (np.outer(_A, hashes) + _B[:, None]) % _PRIME
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+def signature(question: dict) -> np.ndarray:
+    tail = [zlib.crc32(choice.encode()) for choice in choices(question)]
+    tail.append(zlib.crc32(answer_text(question).encode()))
+    return np.concatenate([minhash(question_text(question)), np.array(tail, dtype=np.uint32)])
+
+
+def estimate_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of the question texts behind two signatures."""
+    return float(np.count_nonzero(a[:NUM_PERM] == b[:NUM_PERM])) / NUM_PERM
+
+
+def choice_overlap(a: np.ndarray, b: np.ndarray) -> float:
+    """Jaccard similarity of the choice sets behind two signatures."""
+    x, y = set(a[NUM_PERM:-1].tolist()), set(b[NUM_PERM:-1].tolist())
+    return len(x & y) / len(x | y)
+
+
+def same_answer(a: np.ndarray, b: np.ndarray) -> bool:
+    return a[-1] == b[-1]
+
+
+class LSHIndex:
+    """Banded LSH over the text MinHash of signatures; queries only look at colliding buckets."""
+
+    def __init__(self):
+        self._signatures: Dict[Hashable, np.ndarray] = {}
+        self._buckets: Dict[Tuple[int, bytes], Set[Hashable]] = defaultdict(set)
+
+    def __len__(self):
+        return len(self._signatures)
+
+    @staticmethod
+    def _bands(signature: np.ndarray):
+        for band in range(BANDS):
+            yield band, signature[band * ROWS:(band + 1) * ROWS].tobytes()
+
+    def add(self, key: Hashable, signature: np.ndarray):
+        if key in self._signatures:
+            return
+        self._signatures[key] = signature
+        for bucket in self._bands(signature):
+            self._buckets[bucket].add(key)
+
+    def query(self, signature: np.ndarray, threshold: float) -> Optional[Tuple[Hashable, float]]:
+        """
+        The indexed key whose text is most similar, with an estimated similarity >= threshold,
+        the same correct answer and at least MIN_CHOICE_OVERLAP of the choices in common, if any.
+        """
+        candidates = set()
+        for bucket in self._bands(signature):
+            candidates |= self._buckets.get(bucket, set())
+        best = None
+        for key in candidates:
+            other = self._signatures[key]
+            score = estimate_similarity(signature, other)
+            if score < threshold or not same_answer(signature, other) \
+                    or choice_overlap(signature, other) < MIN_CHOICE_OVERLAP:
+                continue
+            if best is None or score > best[1]:
+                best = (key, score)
+        return best
@@ -0,0 +1,25 @@
+import os
+
+import pytest
+
+# Required settings, so the app can be built without a .env
+for key, value in {
+    "MONGODB_URI": "mongodb://localhost:27017",
+    "SECRET_KEY": "test-secret-key-of-at-least-32-bytes",
+    "FRONTEND_URL": "http://localhost:3000",
+    "GEMINI_API_KEY": "test",
+    "YOUTUBE_API_KEY": "test",
+    "CORS_ORIGINS": "http://localhost:3000",
+}.items():
+    os.environ.setdefault(key, value)
+
+# Tests run against mongomock-motor; swapped in before any quizzly module builds its client
+import motor.motor_asyncio  # noqa: E402
+from mongomock_motor import AsyncMongoMockClient  # noqa: E402
+
+motor.motor_asyncio.AsyncIOMotorClient = AsyncMongoMockClient
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
@@ -0,0 +1,50 @@
+import pytest
+
+from quizzly.main import create_app
+
+
+def _legacy_quiz(quiz_id: str) -> dict:
+    """A quiz stored before submissions moved out of the quiz document."""
+    return {
+        "_id": quiz_id,
+        "name": "Legacy",
+        "created_by": "teacher",
+        "questions": [{"question": "2 + 2?", "answer": "A"}],
+        "taken_by": ["ada"],
+        "user_responses": [{"name": "ada", "score": 1, "answers": [{"question_index": 0, "answer": "A", "is_correct": True}]}],
+    }
+
+
+@pytest.mark.anyio
+async def test_quiz_router_migrates_and_creates_indexes_at_startup():
+    from quizzly.db import submissions
+    from quizzly.db.mongodb import db
+
+    await db.quizzes.insert_one(_legacy_quiz("legacy-with-quiz-router"))
+    app = create_app(["quiz"])
+    async with app.router.lifespan_context(app):
+        stored = await submissions.collection.find_one({"quiz_id": "legacy-with-quiz-router", "name": "ada"})
+        quiz = await db.quizzes.find_one({"_id": "legacy-with-quiz-router"})
+        indexes = await submissions.collection.index_information()
+
+    assert stored["submitted"] and stored["score"] == 1
+    assert quiz["user_responses"] == [] and quiz["taken_by"] == []
+    assert any(
+        index.get("unique") and list(index["key"]) == [("quiz_id", 1), ("name", 1)]
+        for index in indexes.values()
+    )
+
+
+@pytest.mark.anyio
+async def test_app_without_quiz_router_leaves_quizzes_alone():
+    from quizzly.db import submissions
+    from quizzly.db.mongodb import db
+
+    await db.quizzes.insert_one(_legacy_quiz("legacy-without-quiz-router"))
+    app = create_app(["parent"])
+    async with app.router.lifespan_context(app):
+        stored = await submissions.collection.find_one({"quiz_id": "legacy-without-quiz-router"})
+        quiz = await db.quizzes.find_one({"_id": "legacy-without-quiz-router"})
+
+    assert stored is None
+    assert quiz["taken_by"] == ["ada"]
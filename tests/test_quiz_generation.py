@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from benchmarks import stubs
+from quizzly.main import create_app
+from quizzly.models.quiz import QuizOut
+
+GEMINI_LATENCY = 1.0
+CONCURRENT_CREATES = 4
+
+
+class CountingApp:
+    """ASGI wrapper counting the HTTP requests that reached the wrapped app."""
+
+    def __init__(self, app):
+        self.app = app
+        self.requests = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            self.requests += 1
+        await self.app(scope, receive, send)
+
+
+@pytest.fixture
+def fake_gemini():
+    return CountingApp(stubs.create_app(gemini_latency=GEMINI_LATENCY))
+
+
+@pytest.fixture
+async def client(fake_gemini):
+    from quizzly.auth.jwt_handler import create_token
+    from quizzly.utils import gemini
+
+    app = create_app(["parent", "quiz"])
+    # Every Gemini call is answered by the benchmark stub after GEMINI_LATENCY seconds
+    gemini._client = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake_gemini))
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            client.headers["Authorization"] = f"Bearer {create_token({'id': 'teacher'})}"
+            yield client
+
+
+@pytest.mark.anyio
+async def test_quiz_creation_does_not_block_other_requests(client, fake_gemini):
+    started = time.perf_counter()
+    creates = [
+        asyncio.create_task(client.post("/quiz/quizzes/create", json={
+            "name": f"Quiz {i}",
+            "subject": "Science",
+            "topic": f"Topic {i}",
+            "num_questions": 5,
+            "difficulty_level": 3,
+        }))
+        for i in range(CONCURRENT_CREATES)
+    ]
+    # All creates waiting on Gemini at once, then another request: if a Gemini call
+    # blocked the event loop, each would hold everything else back by GEMINI_LATENCY
+    while fake_gemini.requests < CONCURRENT_CREATES:
+        assert time.perf_counter() - started < GEMINI_LATENCY, "creates did not reach Gemini concurrently"
+        await asyncio.sleep(0.01)
+    response = await client.get("/quiz/question-bank/stats")
+
+    assert response.status_code == 200
+    assert time.perf_counter() - started < GEMINI_LATENCY
+    assert not any(task.done() for task in creates)
+
+    for response in await asyncio.gather(*creates):
+        assert response.status_code == 200
+        # Returned without validation, so check it matches the documented model
+        assert len(QuizOut.model_validate(response.json()).questions) == 5
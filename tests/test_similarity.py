@@ -0,0 +1,49 @@
+from quizzly.utils import similarity
+
+THRESHOLD = 0.6
+
+
+def question(text: str, *choices: str, answer: str = "A") -> dict:
+    return {"question": text, **{f"choice_{c}": choice for c, choice in zip("ABCD", choices)}, "answer": answer}
+
+
+def is_near_duplicate(a: dict, b: dict) -> bool:
+    index = similarity.LSHIndex()
+    index.add("a", similarity.signature(a))
+    return index.query(similarity.signature(b), THRESHOLD) is not None
+
+
+CAPITALS = ("Paris", "Berlin", "Rome", "Madrid")
+
+
+def test_distinct_questions_with_identical_choices_are_kept():
+    france = question("Capital of France?", *CAPITALS, answer="A")
+    germany = question("Capital of Germany?", *CAPITALS, answer="B")
+    assert similarity.estimate_similarity(similarity.signature(france), similarity.signature(germany)) < THRESHOLD
+    assert not is_near_duplicate(france, germany)
+
+
+def test_template_variants_with_different_answers_are_kept():
+    # Texts this close clear the threshold; the correct answers tell them apart
+    france = question("What is the capital city of the country France?", *CAPITALS, answer="A")
+    germany = question("What is the capital city of the country Germany?", *CAPITALS, answer="B")
+    assert similarity.estimate_similarity(similarity.signature(france), similarity.signature(germany)) >= THRESHOLD
+    assert not is_near_duplicate(france, germany)
+
+
+def test_reworded_question_with_reordered_choices_is_a_near_duplicate():
+    original = question("What is the derivative of x squared with respect to x?", "2x", "x", "x^2", "2", answer="A")
+    reworded = question("With respect to x, what is the derivative of x squared?", "x^2", "2", "2x", "x", answer="C")
+    assert is_near_duplicate(original, reworded)
+
+
+def test_same_stem_with_different_choices_is_kept():
+    first = question("Which of these numbers is prime?", "2", "4", "6", "8")
+    second = question("Which of these numbers is prime?", "9", "11", "15", "21")
+    assert not is_near_duplicate(first, second)
+
+
+def test_unrelated_questions_are_kept():
+    capital = question("Capital of France?", *CAPITALS)
+    planet = question("Which planet is known as the red planet?", "Mars", "Venus", "Jupiter", "Saturn")
+    assert not is_near_duplicate(capital, planet)